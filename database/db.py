@@ -1,65 +1,88 @@
 """Database initialization and session management."""
 
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 
-from database.models import Base, Profile, Setting
+from database.migrations import migrate
+from database import epoch
+from database.models import Profile, Setting
+from database.settings import Settings
 
 DB_PATH = Path.home() / ".nominis" / "nominis.db"
 
+# Applied to every new connection. WAL + synchronous=NORMAL means a commit
+# appends to the log without an fsync (durable across app crashes, and
+# checkpointed later); readers never block the writer.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -32768,  # KiB → 32 MiB page cache
+    "mmap_size": 268435456,  # 256 MiB
+}
+
 engine = None
 SessionLocal = None
+_scope = threading.local()
+_settings = Settings()
+_settings_listeners: list = []
+
+
+def _apply_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    for key, value in SQLITE_PRAGMAS.items():
+        cur.execute(f"PRAGMA {key} = {value}")
+    cur.close()
 
 
 def init_db():
     global engine, SessionLocal
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
-    Base.metadata.create_all(engine)  # creates tables only if missing
+    event.listen(engine, "connect", _apply_pragmas)
     SessionLocal = sessionmaker(bind=engine)
-    _migrate(engine)
+    migrate(engine)  # creates tables on first run; no-op once current
     _seed_defaults()
-
-
-def _migrate(eng):
-    """Safely add columns introduced after initial release."""
-    inspector = inspect(eng)
-    with eng.connect() as conn:
-        # v2: streak on name_combos
-        combo_cols = {c["name"] for c in inspector.get_columns("name_combos")}
-        if "streak" not in combo_cols:
-            conn.execute(
-                text(
-                    "ALTER TABLE name_combos ADD COLUMN streak INTEGER NOT NULL DEFAULT 0"
-                )
-            )
-            conn.commit()
-
-        # v3: slot-agnostic reputation on names
-        name_cols = {c["name"] for c in inspector.get_columns("names")}
-        if "rep_wins" not in name_cols:
-            conn.execute(
-                text("ALTER TABLE names ADD COLUMN rep_wins INTEGER NOT NULL DEFAULT 0")
-            )
-            conn.commit()
-        if "rep_losses" not in name_cols:
-            conn.execute(
-                text(
-                    "ALTER TABLE names ADD COLUMN rep_losses INTEGER NOT NULL DEFAULT 0"
-                )
-            )
-            conn.commit()
+    _load_settings()
 
 
 def get_session() -> Session:
     return SessionLocal()
 
 
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Unit of work: one session, one connection, one transaction.
+    Scopes nest per thread — an inner scope joins the outermost one, which
+    commits on success and rolls back on error. Wrap a whole UI action in
+    a scope so its reads and writes share a single transaction.
+    """
+    outer = getattr(_scope, "session", None)
+    if outer is not None:
+        yield outer
+        return
+    s = SessionLocal()
+    _scope.session = s
+    try:
+        yield s
+        s.commit()
+    except BaseException:
+        s.rollback()
+        raise
+    finally:
+        _scope.session = None
+        s.close()
+
+
 def _seed_defaults():
     """Create default profiles and settings if not present."""
-    with get_session() as s:
+    with session_scope() as s:
         if not s.query(Profile).first():
             s.add_all(
                 [
@@ -67,32 +90,68 @@ def _seed_defaults():
                     Profile(id=2, label="Wife", accent_color="#ffb6c1"),
                 ]
             )
-        defaults = {
-            "surname": "Smith",
-            "match_random_pct": "25",
-            "elo_spread_thresh": "50",
-            # Higher K so scores spread quickly with large pools
-            "k_factor_default": "64",
-            "k_factor_stable": "32",
-            "k_stable_threshold": "30",
-        }
-        for k, v in defaults.items():
+        for k, v in Settings().as_rows().items():
             if not s.get(Setting, k):
                 s.add(Setting(key=k, value=v))
-        s.commit()
+
+
+# ── Settings ───────────────────────────────────────────────────────────────────
+
+
+def _load_settings():
+    global _settings
+    with session_scope() as s:
+        rows = {row.key: row.value for row in s.query(Setting)}
+    _settings = Settings.from_rows(rows)
+
+
+def settings() -> Settings:
+    """The current typed settings snapshot — an attribute read, no query."""
+    return _settings
+
+
+def on_settings_changed(listener):
+    """Register a callable run with the new Settings after every change."""
+    _settings_listeners.append(listener)
+
+
+def update_settings(**values):
+    """
+    Write several settings in one transaction, then swap in the new
+    snapshot and notify listeners once.
+    """
+    global _settings
+    new = _settings.with_values(values)
+    rows = new.as_rows()
+    with session_scope() as s:
+        for key in values:
+            row = s.get(Setting, key)
+            if row:
+                row.value = rows[key]
+            else:
+                s.add(Setting(key=key, value=rows[key]))
+    if new != _settings:
+        _settings = new
+        epoch.bump(epoch.SETTINGS)
+        for listener in _settings_listeners:
+            listener(new)
 
 
 def get_setting(key: str) -> str:
-    with get_session() as s:
+    if key in Settings.keys():
+        return str(getattr(_settings, key))
+    with session_scope() as s:
         row = s.get(Setting, key)
         return row.value if row else None
 
 
 def set_setting(key: str, value: str):
-    with get_session() as s:
+    if key in Settings.keys():
+        update_settings(**{key: value})
+        return
+    with session_scope() as s:
         row = s.get(Setting, key)
         if row:
             row.value = value
         else:
             s.add(Setting(key=key, value=value))
-        s.commit()
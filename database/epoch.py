@@ -0,0 +1,42 @@
+"""
+Data epochs — a cheap "has anything changed?" check for screens.
+
+Every committed write bumps one global counter and stamps the scopes it
+touched with the new value:
+  • "names"          names added or imported
+  • "settings"       any setting changed
+  • profile_scope(p) votes / skips flushed for profile p
+
+A screen remembers epoch(*scopes it reads) alongside its filters when it
+renders, and skips the next refresh if both are unchanged.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_current = 0
+_scopes: dict[str, int] = {}
+
+NAMES = "names"
+SETTINGS = "settings"
+
+
+def profile_scope(profile_id: int) -> str:
+    return f"profile:{profile_id}"
+
+
+def bump(*scopes: str) -> int:
+    """Record a write touching `scopes`; returns the new global epoch."""
+    global _current
+    with _lock:
+        _current += 1
+        for scope in scopes:
+            _scopes[scope] = _current
+        return _current
+
+
+def epoch(*scopes: str) -> int:
+    """Epoch of the newest write to any of `scopes` (all writes if none given)."""
+    if not scopes:
+        return _current
+    return max(_scopes.get(scope, 0) for scope in scopes)
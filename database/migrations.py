@@ -0,0 +1,207 @@
+"""
+Versioned schema migrations, keyed off SQLite's PRAGMA user_version.
+
+Each step in MIGRATIONS brings the schema from version i to i + 1 and
+records the new version in the same transaction. Once a database is at
+SCHEMA_VERSION, startup is a single PRAGMA read — no create_all, no
+reflection.
+
+Steps must be safe on a database freshly built by create_all (which
+already has every current column and index), because a brand-new file
+also starts at user_version 0.
+"""
+
+import math
+
+from sqlalchemy import text
+
+from database.models import COMBINED_AGGREGATES, Base, combined_scores
+
+
+def _columns(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _add_column(conn, table: str, column: str, ddl: str):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+# ── Steps ──────────────────────────────────────────────────────────────────────
+
+
+def _v1_combo_streak(conn):
+    """streak on name_combos."""
+    _add_column(conn, "name_combos", "streak", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _v2_name_reputation(conn):
+    """Slot-agnostic reputation on names."""
+    _add_column(conn, "names", "rep_wins", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "names", "rep_losses", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _v3_prune_virtual_combos(conn):
+    """
+    Combos are virtual until first played — drop never-played rows that
+    earlier versions generated up front. Returns True so space is reclaimed.
+    """
+    pruned = conn.execute(
+        text(
+            "DELETE FROM name_combos "
+            "WHERE match_count = 0 AND streak = 0 AND elo_score = 1000.0 "
+            "AND id NOT IN (SELECT winner_combo_id FROM matches "
+            "WHERE winner_combo_id IS NOT NULL) "
+            "AND id NOT IN (SELECT loser_combo_id FROM matches "
+            "WHERE loser_combo_id IS NOT NULL)"
+        )
+    ).rowcount
+    return pruned > 0
+
+
+def _v4_indexes(conn):
+    """Composite indexes for the hot leaderboard, matchmaking and log queries."""
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_combo_profile_elo "
+        "ON name_combos (profile_id, elo_score DESC, first_id, middle_id)",
+        "CREATE INDEX IF NOT EXISTS ix_combo_profile_middle "
+        "ON name_combos (profile_id, middle_id)",
+        "CREATE INDEX IF NOT EXISTS ix_match_profile_time "
+        "ON matches (profile_id, timestamp)",
+    ):
+        conn.execute(text(ddl))
+
+
+def _v5_combined_scores(conn):
+    """Backfill the materialized cross-profile scores (table made by create_all)."""
+    profile_ids = [pid for (pid,) in conn.execute(text("SELECT id FROM profiles"))]
+    played: dict[tuple[int, int], dict[int, tuple[float, int]]] = {}
+    for pid, first_id, middle_id, elo, mc in conn.execute(
+        text(
+            "SELECT profile_id, first_id, middle_id, elo_score, match_count "
+            "FROM name_combos"
+        )
+    ):
+        played.setdefault((first_id, middle_id), {})[pid] = (elo, mc)
+
+    columns = ", ".join(f"score_{agg}" for agg in COMBINED_AGGREGATES)
+    params = ", ".join(f":{agg}" for agg in COMBINED_AGGREGATES)
+    rows = [
+        {
+            "first_id": first_id,
+            "middle_id": middle_id,
+            **combined_scores([by_pid.get(pid, (1000.0, 0)) for pid in profile_ids]),
+        }
+        for (first_id, middle_id), by_pid in played.items()
+    ]
+    if rows:
+        conn.execute(
+            text(
+                f"INSERT OR REPLACE INTO combined_scores "
+                f"(first_id, middle_id, {columns}) "
+                f"VALUES (:first_id, :middle_id, {params})"
+            ),
+            rows,
+        )
+
+
+def _v6_bt_score(conn):
+    """Bradley–Terry score column on name_combos, indexed like elo_score."""
+    _add_column(conn, "name_combos", "bt_score", "FLOAT NOT NULL DEFAULT 1000.0")
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_combo_profile_bt "
+            "ON name_combos (profile_id, bt_score DESC, first_id, middle_id)"
+        )
+    )
+
+
+def _v7_glicko(conn):
+    """
+    Glicko-2 columns on name_combos. Existing combos start from their Elo,
+    with the deviation a combo would have after match_count even games
+    (1/RD² grows by (ln 10 / 800)² per game) rather than knowing nothing.
+    """
+    _add_column(conn, "name_combos", "glicko_score", "FLOAT NOT NULL DEFAULT 1000.0")
+    _add_column(conn, "name_combos", "glicko_rd", "FLOAT NOT NULL DEFAULT 350.0")
+    _add_column(conn, "name_combos", "glicko_vol", "FLOAT NOT NULL DEFAULT 0.06")
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_combo_profile_glicko "
+            "ON name_combos (profile_id, glicko_score DESC, first_id, middle_id)"
+        )
+    )
+    per_game = (math.log(10.0) / 800.0) ** 2
+    rows = [
+        {"id": cid, "score": elo, "rd": (1.0 / 350.0**2 + mc * per_game) ** -0.5}
+        for cid, elo, mc in conn.execute(
+            text("SELECT id, elo_score, match_count FROM name_combos")
+        )
+    ]
+    if rows:
+        conn.execute(
+            text(
+                "UPDATE name_combos SET glicko_score = :score, glicko_rd = :rd "
+                "WHERE id = :id"
+            ),
+            rows,
+        )
+
+
+def _v8_gender_mask(conn):
+    """Precomputed gender eligibility on combos and combined scores."""
+    bits = "(SELECT CASE gender WHEN 'M' THEN 1 WHEN 'F' THEN 2 ELSE 3 END FROM names "
+    for table in ("name_combos", "combined_scores"):
+        _add_column(conn, table, "gender_mask", "INTEGER NOT NULL DEFAULT 3")
+        conn.execute(
+            text(
+                f"UPDATE {table} SET gender_mask = "
+                f"{bits}WHERE names.id = {table}.first_id) & "
+                f"{bits}WHERE names.id = {table}.middle_id)"
+            )
+        )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_combo_profile_mask "
+            "ON name_combos (profile_id, gender_mask)"
+        )
+    )
+
+
+MIGRATIONS = [
+    _v1_combo_streak,
+    _v2_name_reputation,
+    _v3_prune_virtual_combos,
+    _v4_indexes,
+    _v5_combined_scores,
+    _v6_bt_score,
+    _v7_glicko,
+    _v8_gender_mask,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+
+
+def migrate(eng) -> int:
+    """Bring the database up to SCHEMA_VERSION; returns the starting version."""
+    with eng.connect() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        if version >= SCHEMA_VERSION:
+            return version
+
+        Base.metadata.create_all(conn)  # new tables only; never alters
+        conn.commit()
+
+        vacuum = False
+        for target, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            vacuum = bool(step(conn)) or vacuum
+            conn.execute(text(f"PRAGMA user_version = {target}"))
+            conn.commit()
+
+    if vacuum:
+        # Give the space back; VACUUM cannot run inside a transaction
+        with eng.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    return version
@@ -1,6 +1,7 @@
 """SQLAlchemy ORM models for Nominis."""
 
 import enum
+import math
 from datetime import datetime
 
 from sqlalchemy import (
@@ -9,6 +10,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -25,6 +27,59 @@ class Gender(enum.Enum):
     N = "N"
 
 
+# Gender modes a name suits, as bits: 1 = "M" mode, 2 = "F" mode
+GENDER_BITS = {Gender.M: 1, Gender.F: 2, Gender.N: 3}
+
+
+def gender_mask(first: Gender, middle: Gender) -> int:
+    """Modes a combo is eligible in: those both of its names suit."""
+    return GENDER_BITS[first] & GENDER_BITS[middle]
+
+
+def reputation_score(rep_wins: int, rep_losses: int) -> float:
+    """
+    Score in roughly [0.2, 2.0].
+      Neutral (no matches) → 1.0
+      Pure winner          → approaches 2.0
+      Pure loser           → approaches 0.2
+    Uses Laplace smoothing so new names start neutral.
+    """
+    total = rep_wins + rep_losses
+    if total == 0:
+        return 1.0
+    win_rate = (rep_wins + 1) / (total + 2)  # Laplace smoothed
+    return 0.2 + 1.8 * win_rate  # map [0,1] → [0.2, 2.0]
+
+
+# Where rankings read a combo's score: NameCombo.<source>_score
+#   elo     online Elo, updated on every vote (logic/elo)
+#   bt      Bradley–Terry fit over the whole match log (logic/bradley_terry)
+#   glicko  Glicko-2 rating, updated on every vote alongside Elo (logic/glicko)
+SCORE_SOURCES = ("elo", "bt", "glicko")
+
+# How the Combined ranking folds per-profile Elo into one score
+COMBINED_AGGREGATES = ("mean", "min", "geo", "weighted")
+
+
+def combined_scores(ratings: list[tuple[float, int]]) -> dict[str, float]:
+    """
+    Every combined aggregate of one pair's per-profile (elo, match_count),
+    one entry per profile (unplayed = default Elo, 0 matches).
+      mean      plain average
+      min       the pair is only as good as its least-liked profile
+      geo       geometric mean — penalises disagreement more gently than min
+      weighted  average weighted by matches + 1 (more-played ratings count more)
+    """
+    elos = [elo for elo, _ in ratings]
+    weights = [mc + 1 for _, mc in ratings]
+    return {
+        "mean": sum(elos) / len(elos),
+        "min": min(elos),
+        "geo": math.exp(sum(math.log(max(e, 1.0)) for e in elos) / len(elos)),
+        "weighted": sum(e * w for e, w in zip(elos, weights)) / sum(weights),
+    }
+
+
 class Name(Base):
     __tablename__ = "names"
 
@@ -41,18 +96,8 @@ class Name(Base):
 
     @property
     def reputation(self) -> float:
-        """
-        Score in roughly [0.2, 2.0].
-          Neutral (no matches) → 1.0
-          Pure winner          → approaches 2.0
-          Pure loser           → approaches 0.2
-        Uses Laplace smoothing so new names start neutral.
-        """
-        total = self.rep_wins + self.rep_losses
-        if total == 0:
-            return 1.0
-        win_rate = (self.rep_wins + 1) / (total + 2)  # Laplace smoothed
-        return 0.2 + 1.8 * win_rate  # map [0,1] → [0.2, 2.0]
+        """Slot-agnostic win rate mapped to [0.2, 2.0]; see reputation_score."""
+        return reputation_score(self.rep_wins, self.rep_losses)
 
     def __repr__(self):
         return f"<Name {self.text!r} ({self.gender.value}) rep={self.reputation:.2f}>"
@@ -93,15 +138,52 @@ class NameCombo(Base):
     elo_score = Column(Float, default=1000.0, nullable=False)
     match_count = Column(Integer, default=0, nullable=False)
     streak = Column(Integer, default=0, nullable=False)
+    # gender_mask(first.gender, middle.gender), set when the row is written
+    gender_mask = Column(Integer, default=3, server_default="3", nullable=False)
+    # Batch-fitted, on the Elo scale; default until the next fit
+    bt_score = Column(Float, default=1000.0, nullable=False)
+    # Glicko-2 rating, deviation and volatility (see logic/glicko)
+    glicko_score = Column(Float, default=1000.0, nullable=False)
+    glicko_rd = Column(Float, default=350.0, nullable=False)
+    glicko_vol = Column(Float, default=0.06, nullable=False)
 
     __table_args__ = (
         UniqueConstraint("profile_id", "first_id", "middle_id", name="uq_combo"),
+        # Covers top-N by profile without touching the table
+        Index(
+            "ix_combo_profile_elo",
+            profile_id,
+            elo_score.desc(),
+            first_id,
+            middle_id,
+        ),
+        Index("ix_combo_profile_middle", profile_id, middle_id),
+        Index("ix_combo_profile_mask", profile_id, gender_mask),
+        Index(
+            "ix_combo_profile_bt",
+            profile_id,
+            bt_score.desc(),
+            first_id,
+            middle_id,
+        ),
+        Index(
+            "ix_combo_profile_glicko",
+            profile_id,
+            glicko_score.desc(),
+            first_id,
+            middle_id,
+        ),
     )
 
     profile = relationship("Profile", back_populates="combos")
     first = relationship("Name", foreign_keys=[first_id])
     middle = relationship("Name", foreign_keys=[middle_id])
 
+    @classmethod
+    def score_column(cls, source: str):
+        """The column holding scores for `source` (one of SCORE_SOURCES)."""
+        return getattr(cls, f"{source}_score")
+
     def __repr__(self):
         return (
             f"<NameCombo profile={self.profile_id} "
@@ -110,6 +192,40 @@ class NameCombo(Base):
         )
 
 
+class CombinedScore(Base):
+    """
+    Cross-profile score of an ordered pair, kept in step with its NameCombo
+    rows (see logic/combined) so the Combined top-N is an index range read.
+    Only pairs played in at least one profile have a row.
+    """
+
+    __tablename__ = "combined_scores"
+
+    first_id = Column(Integer, ForeignKey("names.id"), primary_key=True)
+    middle_id = Column(Integer, ForeignKey("names.id"), primary_key=True)
+    score_mean = Column(Float, nullable=False)
+    score_min = Column(Float, nullable=False)
+    score_geo = Column(Float, nullable=False)
+    score_weighted = Column(Float, nullable=False)
+    gender_mask = Column(
+        Integer, default=3, server_default="3", nullable=False
+    )  # as NameCombo
+
+    # One per aggregate: each Combined ordering is an index walk
+    __table_args__ = (
+        Index("ix_combined_mean", score_mean.desc()),
+        Index("ix_combined_min", score_min.desc()),
+        Index("ix_combined_geo", score_geo.desc()),
+        Index("ix_combined_weighted", score_weighted.desc()),
+    )
+
+    def __repr__(self):
+        return (
+            f"<CombinedScore first={self.first_id} middle={self.middle_id} "
+            f"mean={self.score_mean:.1f}>"
+        )
+
+
 class Match(Base):
     __tablename__ = "matches"
 
@@ -120,6 +236,8 @@ class Match(Base):
     was_skip = Column(Boolean, default=False, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_match_profile_time", profile_id, timestamp),)
+
     profile = relationship("Profile", back_populates="matches")
     winner = relationship("NameCombo", foreign_keys=[winner_combo_id])
     loser = relationship("NameCombo", foreign_keys=[loser_combo_id])
@@ -0,0 +1,66 @@
+"""
+Typed application settings.
+
+The Setting table stores every value as text; Settings is the typed,
+immutable view of it that the rest of the app reads. database/db loads one
+snapshot at startup and swaps in a new one whenever a setting is written,
+so hot paths (K-factors per vote, random % per pick, surname per label)
+read plain attributes with no queries.
+"""
+
+from dataclasses import dataclass, fields, replace
+
+
+@dataclass(frozen=True)
+class Settings:
+    surname: str = "Smith"
+    match_random_pct: int = 25
+    # Pair selection — one of matchmaker.STRATEGIES — and its top-K target
+    match_strategy: str = "classic"
+    active_top_k: int = 10
+    # Cooldowns (logic/recent): pairs remembered, rounds a name sits out,
+    # and the size of the long pair history (0 = off)
+    recent_pairs: int = 50
+    recent_names: int = 1
+    pair_history: int = 0
+    # Preference graph (logic/prefgraph): wins an implied result may chain
+    # (0 = never skip implied pairs), and % of picks spent on cycles
+    implied_depth: int = 2
+    cycle_match_pct: int = 10
+    # Combos shown per match: 2 = this-or-that, 3–6 = pick the best of N
+    round_size: int = 2
+    elo_spread_thresh: int = 50
+    # Higher K so scores spread quickly with large pools
+    k_factor_default: int = 64
+    k_factor_stable: int = 32
+    k_stable_threshold: int = 30
+    # Combined ranking aggregate — one of models.COMBINED_AGGREGATES
+    combined_score: str = "mean"
+    # Score rankings are read from — one of models.SCORE_SOURCES
+    score_source: str = "elo"
+
+    @classmethod
+    def keys(cls) -> set[str]:
+        return {f.name for f in fields(cls)}
+
+    @classmethod
+    def from_rows(cls, rows: dict[str, str]) -> "Settings":
+        """Build from raw key → text rows; missing or bad values use defaults."""
+        return cls().with_values(rows)
+
+    def with_values(self, values: dict) -> "Settings":
+        """Copy with `values` applied, each coerced to its field's type."""
+        changes = {}
+        for f in fields(self):
+            if f.name not in values:
+                continue
+            cast = type(getattr(self, f.name))
+            try:
+                changes[f.name] = cast(values[f.name])
+            except (TypeError, ValueError):
+                continue
+        return replace(self, **changes)
+
+    def as_rows(self) -> dict[str, str]:
+        """Raw key → text form, as stored in the Setting table."""
+        return {f.name: str(getattr(self, f.name)) for f in fields(self)}
@@ -0,0 +1,46 @@
+"""
+Bloom filter — approximate set membership in a fixed bit array.
+
+Holds integer keys (already hashed, e.g. by logic/recent) in `bits` bits
+with `hashes` probes each, derived by double hashing from the key. There
+are no false negatives; false positives run at about `error` once
+`capacity` keys are in, and grow beyond that, so callers clear() the
+filter when `full`.
+"""
+
+import math
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15  # 64-bit multiplicative hash constant
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error: float = 0.01):
+        self.capacity = max(1, capacity)
+        ln2 = math.log(2.0)
+        self.bits = max(8, int(-self.capacity * math.log(error) / (ln2 * ln2)))
+        self.hashes = max(1, round(self.bits / self.capacity * ln2))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: int):
+        h1 = key & _MASK
+        h2 = ((h1 * _GOLDEN) & _MASK) >> 32 | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key: int):
+        for p in self._positions(key):
+            self._array[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def clear(self):
+        self._array = bytearray(len(self._array))
+        self.count = 0
@@ -0,0 +1,149 @@
+"""
+Bradley–Terry rating fit — a batch alternative to online Elo.
+
+Online Elo depends on the order votes arrived in and stays noisy while
+combos have few votes. fit_bradley_terry() instead fits one strength p
+per combo to the whole match history of its profile at once, by maximum
+likelihood: P(i beats j) = p_i / (p_i + p_j).
+
+The fit uses Hunter's MM iteration over a sparse win matrix (one entry
+per pair of combos that actually met, with its vote counts):
+
+    p_i ← W_i / Σ_j n_ij / (p_i + p_j)
+
+The matrix is held as NumPy edge arrays (i, j, n_ij), so an iteration is
+a handful of array operations rather than a Python loop over edges. The
+fit runs on a worker thread (SettingsScreen); with the work in NumPy it
+is short and mostly outside the GIL, so votes on the GUI thread don't
+queue behind it.
+
+Each combo also gets one virtual win and one virtual loss against an
+anchor of strength 1. That keeps undefeated and winless combos finite
+and pins the scale, so an unplayed combo sits exactly at the anchor.
+Strengths are stored on the Elo scale (1000 + 400·log10 p) in
+NameCombo.bt_score, where rankings can read them in place of elo_score
+(Settings.score_source).
+"""
+
+import math
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import select
+
+from database import epoch
+from database.db import session_scope, settings
+from database.models import NameCombo, Profile
+from logic.combined import rebuild_combined
+from logic.elo import flush_votes
+from logic.pool import DEFAULT_ELO
+
+PRIOR_GAMES = 1.0  # virtual wins and losses against the anchor, per combo
+MAX_ITERATIONS = 500
+TOLERANCE = 0.01  # stop once no score moves more than this many Elo points
+
+_LOG_TO_ELO = 400.0 / math.log(10.0)
+
+
+def _mm_fit(
+    wins: np.ndarray, i: np.ndarray, j: np.ndarray, games: np.ndarray
+) -> np.ndarray:
+    """
+    MM iteration for combos with total `wins` each and edges `i`–`j` with
+    `games` between them; returns log-strengths.
+    """
+    n = len(wins)
+    p = np.ones(n)
+    numerator = wins + PRIOR_GAMES
+    anchor_games = 2.0 * PRIOR_GAMES
+    for _ in range(MAX_ITERATIONS):
+        share = games / (p[i] + p[j])
+        denominator = (
+            anchor_games / (p + 1.0)
+            + np.bincount(i, share, minlength=n)
+            + np.bincount(j, share, minlength=n)
+        )
+        new = numerator / denominator
+        delta = np.abs(np.log(new / p)).max(initial=0.0)
+        p = new
+        if delta * _LOG_TO_ELO < TOLERANCE:
+            break
+    return np.log(p)
+
+
+def fit_bradley_terry() -> int:
+    """Refit bt_score for every profile from the match log; returns votes used."""
+    flush_votes()  # fit the complete history
+
+    with session_scope() as s:
+        combos = s.execute(
+            select(
+                NameCombo.id,
+                NameCombo.profile_id,
+                NameCombo.first_id,
+                NameCombo.middle_id,
+                NameCombo.match_count,
+                NameCombo.bt_score,
+            )
+        ).all()
+        n = len(combos)
+        combo_ids = np.fromiter((c[0] for c in combos), np.int64, n)
+        profile_of = np.fromiter((c[1] for c in combos), np.int64, n)
+        # combo id → dense index (-1 for ids without a row)
+        index = np.full(int(combo_ids.max(initial=0)) + 1, -1, np.int64)
+        index[combo_ids] = np.arange(n)
+
+        # Votes as (winner, loser) dense index arrays, streamed from the
+        # driver straight into an array
+        conn = s.connection()
+        log = conn.exec_driver_sql(
+            "SELECT winner_combo_id, loser_combo_id FROM matches"
+            " WHERE NOT was_skip AND winner_combo_id <= ? AND loser_combo_id <= ?",
+            (len(index) - 1, len(index) - 1),
+        ).cursor
+        voted = index[np.fromiter(chain.from_iterable(log), np.int64).reshape(-1, 2)]
+        voted = voted[(voted >= 0).all(axis=1)]
+        # A vote across profiles has no place in either profile's fit
+        voted = voted[profile_of[voted[:, 0]] == profile_of[voted[:, 1]]]
+        votes = len(voted)
+        wins = np.bincount(voted[:, 0], minlength=n).astype(float)
+
+        # Sparse win matrix: games per unordered pair, found by a sort on
+        # one int64 key per vote (lo·n + hi)
+        lo = voted.min(axis=1)
+        hi = voted.max(axis=1)
+        keys, games = np.unique(lo * n + hi, return_counts=True)
+        edges = np.stack([keys // n, keys % n], axis=1)
+        games = games.astype(float)
+
+        # Matches never cross profiles, so each profile is its own fit
+        scores = np.full(n, DEFAULT_ELO)
+        local = np.empty(n, np.int64)  # combo index → index within its profile
+        for pid in np.unique(profile_of):
+            members = np.flatnonzero(profile_of == pid)
+            local[members] = np.arange(len(members))
+            mine = profile_of[edges[:, 0]] == pid
+            logs = _mm_fit(
+                wins[members],
+                local[edges[mine, 0]],
+                local[edges[mine, 1]],
+                games[mine],
+            )
+            scores[members] = DEFAULT_ELO + _LOG_TO_ELO * logs
+        rows = [
+            (score, c[0]) for c, score in zip(combos, scores.tolist()) if score != c[5]
+        ]
+        if rows:
+            conn.exec_driver_sql(
+                "UPDATE name_combos SET bt_score = ? WHERE id = ?", rows
+            )
+            if settings().score_source == "bt":
+                ratings = np.array([c[1:5] for c in combos], dtype=float)
+                ratings = ratings.reshape(-1, 4)
+                rebuild_combined(
+                    s, np.column_stack((ratings[:, :3], scores, ratings[:, 3]))
+                )
+        profile_ids = [pid for (pid,) in s.query(Profile.id)]
+
+    epoch.bump(*(epoch.profile_scope(pid) for pid in profile_ids))
+    return votes
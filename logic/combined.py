@@ -0,0 +1,122 @@
+"""
+Combined (cross-profile) ranking, materialized in CombinedScore.
+
+Whenever a flush changes a pair's rating in any profile, its CombinedScore
+row is recomputed from that pair's NameCombo rows — one indexed lookup per
+pair — so the Combined leaderboard reads an index instead of aggregating
+name_combos. Scores come from the active Settings.score_source, so the
+table is rebuilt whenever that changes. Pairs unplayed in every profile
+have no row and score the default Elo under every aggregate.
+"""
+
+from collections.abc import Iterable
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import select
+
+from database.db import settings
+from database.models import (
+    COMBINED_AGGREGATES,
+    GENDER_BITS,
+    CombinedScore,
+    Name,
+    NameCombo,
+    Profile,
+    combined_scores,
+)
+from logic.pool import DEFAULT_ELO, ComboKey
+
+
+def refresh_combined(s, keys: Iterable[ComboKey]):
+    """Recompute the CombinedScore rows for `keys` inside session `s`."""
+    profile_ids = [pid for (pid,) in s.query(Profile.id)]
+    score = NameCombo.score_column(settings().score_source)
+    for first_id, middle_id in set(keys):
+        played = {}
+        for pid, elo, mc, mask in s.query(
+            NameCombo.profile_id, score, NameCombo.match_count, NameCombo.gender_mask
+        ).filter(
+            NameCombo.profile_id.in_(profile_ids),
+            NameCombo.first_id == first_id,
+            NameCombo.middle_id == middle_id,
+        ):
+            played[pid] = (elo, mc)
+        row = s.get(CombinedScore, (first_id, middle_id))
+        if not played:
+            if row is not None:
+                s.delete(row)
+            continue
+        if row is None:
+            row = CombinedScore(first_id=first_id, middle_id=middle_id)
+            s.add(row)
+        scores = combined_scores(
+            [played.get(pid, (DEFAULT_ELO, 0)) for pid in profile_ids]
+        )
+        for agg, value in scores.items():
+            setattr(row, f"score_{agg}", value)
+        row.gender_mask = mask  # the same in every profile
+
+
+def rebuild_combined(s, ratings: np.ndarray | None = None):
+    """
+    Recompute every CombinedScore row from scratch (after a bulk rewrite).
+    `ratings` — one (profile_id, first_id, middle_id, score, match_count)
+    row per combo, scores from the active source — saves re-reading
+    name_combos when the caller already has it. The aggregates are
+    computed for every pair at once, as combined_scores would one by one.
+    """
+    profile_ids = [pid for (pid,) in s.query(Profile.id)]
+    conn = s.connection()
+    if ratings is None:
+        score = NameCombo.score_column(settings().score_source).name
+        cursor = conn.exec_driver_sql(
+            f"SELECT profile_id, first_id, middle_id, {score}, match_count"
+            " FROM name_combos"
+        ).cursor
+        ratings = np.fromiter(chain.from_iterable(cursor), float).reshape(-1, 5)
+    profile_index = np.full(max(profile_ids, default=0) + 1, -1)
+    profile_index[profile_ids] = np.arange(len(profile_ids))
+    pids = ratings[:, 0].astype(np.int64)
+    ratings = ratings[(pids < len(profile_index)) & (profile_index[pids] >= 0)]
+    col = profile_index[ratings[:, 0].astype(np.int64)]
+    first_ids = ratings[:, 1].astype(np.int64)
+    middle_ids = ratings[:, 2].astype(np.int64)
+
+    # One row per played pair, one column per profile (unplayed = default)
+    stride = max(first_ids.max(initial=0), middle_ids.max(initial=0)) + 1
+    pairs, row = np.unique(first_ids * stride + middle_ids, return_inverse=True)
+    elos = np.full((len(pairs), len(profile_ids)), DEFAULT_ELO)
+    weights = np.ones_like(elos)  # match_count + 1
+    elos[row, col] = ratings[:, 3]
+    weights[row, col] = ratings[:, 4] + 1
+    scores = {
+        "mean": elos.sum(axis=1) / len(profile_ids),
+        "min": elos.min(axis=1),
+        "geo": np.exp(np.log(np.maximum(elos, 1.0)).sum(axis=1) / len(profile_ids)),
+        "weighted": (elos * weights).sum(axis=1) / weights.sum(axis=1),
+    }
+
+    bits = np.zeros(stride, dtype=np.int64)
+    for name_id, gender in s.execute(select(Name.id, Name.gender)):
+        if name_id < stride:
+            bits[name_id] = GENDER_BITS[gender]
+    firsts, middles = pairs // stride, pairs % stride
+    rows = list(
+        zip(
+            firsts.tolist(),
+            middles.tolist(),
+            (bits[firsts] & bits[middles]).tolist(),
+            *(scores[agg].tolist() for agg in COMBINED_AGGREGATES),
+        )
+    )
+
+    conn.exec_driver_sql("DELETE FROM combined_scores")
+    if rows:
+        # Driver executemany on plain tuples: no per-row parameter building
+        columns = ", ".join(f"score_{agg}" for agg in COMBINED_AGGREGATES)
+        conn.exec_driver_sql(
+            f"INSERT INTO combined_scores (first_id, middle_id, gender_mask, "
+            f"{columns}) VALUES (?, ?, ?{', ?' * len(COMBINED_AGGREGATES)})",
+            rows,
+        )
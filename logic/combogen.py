@@ -1,51 +1,65 @@
-"""Combo generation — create all ordered (first, middle) pairs for a new name."""
+"""
+Combo generation — new names join the pool of ordered (first, middle) pairs.
 
-from database.db import get_session
-from database.models import Name, NameCombo
+Combos are virtual until first played (see logic/pool): adding a name
+writes no NameCombo rows at all. Every ordered pairing with the existing
+names, for every profile, is immediately available to the matchmaker and
+leaderboards as an implicit default-rated combo, and is materialized by
+logic/elo on its first vote.
+"""
+
+from sqlalchemy import func
+
+from database import epoch
+from database.db import session_scope
+from database.models import Gender, Name, Profile
+from logic.pool import names_added
+
+
+def _new_pairings(s, added: int) -> int:
+    """Ordered pairs (× profiles) gained by the newest `added` names."""
+    total = s.query(func.count(Name.id)).scalar()
+    profiles = s.query(func.count(Profile.id)).scalar()
+    before = total - added
+    return profiles * (total * (total - 1) - before * (before - 1))
 
 
 def generate_combos_for_new_name(new_name_id: int):
     """
-    When a new name is added, create all ordered pairs involving it:
-      - (new, existing) and (existing, new) for every other name
-      - across both profiles (1 and 2)
-    A name cannot be paired with itself.
+    When a new name is added, all ordered pairs involving it become
+    available: (new, existing) and (existing, new) for every other name,
+    across every profile. A name cannot be paired with itself.
+    Returns how many pairings were added.
+    """
+    with session_scope() as s:
+        count = _new_pairings(s, 1)
+
+    epoch.bump(epoch.NAMES)
+    names_added([new_name_id])
+    return count
+
+
+def import_names(entries: list[tuple[str, Gender]]) -> tuple[int, int]:
+    """
+    Bulk import: insert every new name in one transaction.
+    Returns (names added, names skipped as duplicates).
     """
-    with get_session() as s:
-        all_names = s.query(Name).all()
-        all_ids = [n.id for n in all_names]
-
-        existing_combos = set(
-            (c.profile_id, c.first_id, c.middle_id)
-            for c in s.query(
-                NameCombo.profile_id, NameCombo.first_id, NameCombo.middle_id
-            ).all()
-        )
-
-        new_rows = []
-        for pid in (1, 2):
-            for other_id in all_ids:
-                if other_id == new_name_id:
-                    continue
-                # new as first
-                if (pid, new_name_id, other_id) not in existing_combos:
-                    new_rows.append(
-                        NameCombo(
-                            profile_id=pid, first_id=new_name_id, middle_id=other_id
-                        )
-                    )
-                    existing_combos.add((pid, new_name_id, other_id))
-                # new as middle
-                if (pid, other_id, new_name_id) not in existing_combos:
-                    new_rows.append(
-                        NameCombo(
-                            profile_id=pid, first_id=other_id, middle_id=new_name_id
-                        )
-                    )
-                    existing_combos.add((pid, other_id, new_name_id))
-
-        if new_rows:
-            s.add_all(new_rows)
-            s.commit()
-
-    return len(new_rows)
+    with session_scope() as s:
+        existing = {t for (t,) in s.query(Name.text)}
+        new_names = []
+        for name_text, gender in entries:
+            if name_text in existing:
+                continue
+            existing.add(name_text)
+            new_names.append(Name(text=name_text, gender=gender))
+
+        if not new_names:
+            return 0, len(entries)
+
+        s.add_all(new_names)
+        s.flush()
+        new_ids = [n.id for n in new_names]
+
+    epoch.bump(epoch.NAMES)
+    names_added(new_ids)
+    return len(new_ids), len(entries) - len(new_ids)
@@ -1,14 +1,46 @@
-"""Elo rating logic — operates on NameCombo rows, also updates Name reputation."""
+"""
+Elo rating logic — operates on NameCombo rows, also updates Name reputation.
 
-from database.db import get_session, get_setting
-from database.models import Match, Name, NameCombo
+Combos are addressed by ComboKey (first_id, middle_id); a NameCombo row
+is only created when a virtual combo is first voted on.
+
+Votes are write-behind: update_elo / record_skip apply the result to the
+resident pools immediately and append it to the vote journal; the journal
+is flushed to the database in batches (size threshold, a UI timer, tab
+switches and app exit), one transaction per batch. The size threshold
+and the timer only request_flush(), which hands the batch to a worker
+thread, so a vote never waits on a transaction. A failed background
+flush keeps its entries queued for the next one; it is logged once per
+failure streak and reported to on_flush_status() listeners.
+
+A round of N (update_round) is one journal entry: the pairwise results
+it implies — the winner over each other combo, or every pair of a full
+ordering — are applied in order, as that many ordinary match rows, all
+in the same transaction. Rating them as plain pairwise votes keeps the
+match log the only record, so logic/replay needs nothing new.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from database import db, epoch
+from database.db import get_setting, session_scope, settings
+from database.models import Match, Name, NameCombo, Setting, gender_mask
+from logic import glicko, pool, prefgraph
+from logic.combined import refresh_combined
+from logic.journal import VoteJournal
+from logic.pool import ComboKey
+
+JOURNAL_SEQ_KEY = "journal_seq"
 
 
 def _k(match_count: int) -> float:
-    threshold = int(get_setting("k_stable_threshold") or 30)
-    k_default = float(get_setting("k_factor_default") or 64)
-    k_stable = float(get_setting("k_factor_stable") or 32)
-    return k_stable if match_count >= threshold else k_default
+    cfg = settings()
+    if match_count >= cfg.k_stable_threshold:
+        return float(cfg.k_factor_stable)
+    return float(cfg.k_factor_default)
 
 
 def expected(ra: float, rb: float) -> float:
@@ -30,6 +62,37 @@ def _update_streak(combo: NameCombo, won: bool):
     combo.streak = max(-5, min(5, combo.streak))
 
 
+def _rate(w, l):  # noqa: E741
+    """Elo + streak update on two combo-like objects (ORM rows or pool states)."""
+    ea = expected(w.elo_score, l.elo_score)
+    eb = expected(l.elo_score, w.elo_score)
+
+    kw = _k(w.match_count)
+    kl = _k(l.match_count)
+
+    w.elo_score += kw * (1.0 - ea)
+    l.elo_score += kl * (0.0 - eb)
+    w.match_count += 1
+    l.match_count += 1
+
+    _update_streak(w, won=True)
+    _update_streak(l, won=False)
+    glicko.rate(w, l)
+
+
+def _cool(combo):
+    """
+    Skip effect: nudge match_count down, cool the streak by one step, and
+    let the Glicko deviation grow as for a period without a result.
+    """
+    combo.match_count = max(0, combo.match_count - 1)
+    if combo.streak > 0:
+        combo.streak = max(0, combo.streak - 1)
+    elif combo.streak < 0:
+        combo.streak = min(0, combo.streak + 1)
+    glicko.idle(combo)
+
+
 def _update_name_rep(s, combo: NameCombo, won: bool):
     """Increment slot-agnostic win/loss on both names in a combo."""
     for name_id in (combo.first_id, combo.middle_id):
@@ -42,60 +105,286 @@ def _update_name_rep(s, combo: NameCombo, won: bool):
             name.rep_losses += 1
 
 
-def update_elo(profile_id: int, winner_combo_id: int, loser_combo_id: int):
-    """Apply Elo update, update streaks, update name reputations, record match."""
-    with get_session() as s:
-        w = s.get(NameCombo, winner_combo_id)
-        l = s.get(NameCombo, loser_combo_id)  # noqa: E741
-        if not w or not l:
-            return
-
-        ea = expected(w.elo_score, l.elo_score)
-        eb = expected(l.elo_score, w.elo_score)
-
-        kw = _k(w.match_count)
-        kl = _k(l.match_count)
-
-        w.elo_score += kw * (1.0 - ea)
-        l.elo_score += kl * (0.0 - eb)
-        w.match_count += 1
-        l.match_count += 1
-
-        _update_streak(w, won=True)
-        _update_streak(l, won=False)
-
-        _update_name_rep(s, w, won=True)
-        _update_name_rep(s, l, won=False)
-
-        s.add(
-            Match(
-                profile_id=profile_id,
-                winner_combo_id=winner_combo_id,
-                loser_combo_id=loser_combo_id,
-                was_skip=False,
-            )
+# ── Database side (runs at flush time) ─────────────────────────────────────────
+
+
+def _find_combo(s, profile_id: int, ref) -> NameCombo | None:
+    """Row for a [first_id, middle_id] key (or a legacy row id), if it exists."""
+    if isinstance(ref, int):
+        return s.get(NameCombo, ref)
+    return (
+        s.query(NameCombo)
+        .filter_by(profile_id=profile_id, first_id=ref[0], middle_id=ref[1])
+        .one_or_none()
+    )
+
+
+def _get_or_create_combo(s, profile_id: int, ref) -> NameCombo | None:
+    """Materialize a virtual combo on its first vote."""
+    combo = _find_combo(s, profile_id, ref)
+    if combo is None and not isinstance(ref, int):
+        first, middle = s.get(Name, ref[0]), s.get(Name, ref[1])
+        if first is None or middle is None:
+            return None
+        combo = NameCombo(
+            profile_id=profile_id,
+            first_id=ref[0],
+            middle_id=ref[1],
+            elo_score=pool.DEFAULT_ELO,
+            match_count=0,
+            streak=0,
+            gender_mask=gender_mask(first.gender, middle.gender),
+            glicko_score=pool.DEFAULT_ELO,
+            glicko_rd=glicko.DEFAULT_RD,
+            glicko_vol=glicko.DEFAULT_VOL,
         )
-        s.commit()
+        s.add(combo)
+        s.flush()
+    return combo
 
 
-def record_skip(profile_id: int, combo_a_id: int, combo_b_id: int):
-    """Record a skip — nudge match_count down, cool streaks slightly."""
-    with get_session() as s:
-        for cid in (combo_a_id, combo_b_id):
-            combo = s.get(NameCombo, cid)
-            if combo:
-                combo.match_count = max(0, combo.match_count - 1)
-                if combo.streak > 0:
-                    combo.streak = max(0, combo.streak - 1)
-                elif combo.streak < 0:
-                    combo.streak = min(0, combo.streak + 1)
-
-        s.add(
-            Match(
-                profile_id=profile_id,
-                winner_combo_id=None,
-                loser_combo_id=None,
-                was_skip=True,
-            )
+def _apply_vote(s, profile_id: int, winner_key, loser_key, ts) -> list[NameCombo]:
+    """Apply one vote; returns the combo rows it changed."""
+    w = _get_or_create_combo(s, profile_id, winner_key)
+    l = _get_or_create_combo(s, profile_id, loser_key)  # noqa: E741
+    if not w or not l:
+        return []
+
+    _rate(w, l)
+    _update_name_rep(s, w, won=True)
+    _update_name_rep(s, l, won=False)
+
+    s.add(
+        Match(
+            profile_id=profile_id,
+            winner_combo_id=w.id,
+            loser_combo_id=l.id,
+            was_skip=False,
+            timestamp=ts,
+        )
+    )
+    return [w, l]
+
+
+def _apply_skip(s, profile_id: int, key_a, key_b, ts) -> list[NameCombo]:
+    """Record one skip; returns the combo rows it cooled."""
+    combos = [_find_combo(s, profile_id, key) for key in (key_a, key_b)]
+    cooled = [c for c in combos if c]  # virtual combos have nothing to cool
+    for combo in cooled:
+        _cool(combo)
+
+    # A skip has no winner; the two columns just record which combos were
+    # cooled, so logic/replay can redo it
+    s.add(
+        Match(
+            profile_id=profile_id,
+            winner_combo_id=combos[0].id if combos[0] else None,
+            loser_combo_id=combos[1].id if combos[1] else None,
+            was_skip=True,
+            timestamp=ts,
         )
-        s.commit()
+    )
+    return cooled
+
+
+def _apply_round(s, profile_id: int, keys, ordered: bool, ts) -> list[NameCombo]:
+    """Apply every result a round implies; returns the combo rows it changed."""
+    touched = []
+    for winner_key, loser_key in _round_results(keys, ordered):
+        touched += _apply_vote(s, profile_id, winner_key, loser_key, ts)
+    return touched
+
+
+def _apply_batch(entries: list[dict]):
+    """Write a batch of journal entries in a single transaction."""
+    with session_scope() as s:
+        touched = []
+        for e in entries:
+            ts = datetime.fromisoformat(e["ts"])
+            if e["kind"] == "round":
+                touched += _apply_round(
+                    s, e["profile_id"], e["keys"], e.get("ordered", False), ts
+                )
+                continue
+            apply = _apply_vote if e["kind"] == "vote" else _apply_skip
+            touched += apply(s, e["profile_id"], e["a"], e["b"], ts)
+        refresh_combined(s, ((c.first_id, c.middle_id) for c in touched))
+        row = s.get(Setting, JOURNAL_SEQ_KEY)
+        if row is None:
+            row = Setting(key=JOURNAL_SEQ_KEY, value="0")
+            s.add(row)
+        row.value = str(entries[-1]["seq"])
+    epoch.bump(*{epoch.profile_scope(e["profile_id"]) for e in entries})
+
+
+# ── In-memory side (runs immediately) ──────────────────────────────────────────
+
+
+def _vote_in_memory(profile_id: int, winner_key: ComboKey, loser_key: ComboKey):
+    with pool.pool_lock:
+        w = pool.find_combo(profile_id, winner_key)
+        l = pool.find_combo(profile_id, loser_key)  # noqa: E741
+
+        _rate(w, l)
+        names = {}
+        for combo, won in ((w, True), (l, False)):
+            for nid in (combo.first_id, combo.middle_id):
+                name = names.get(nid) or pool.find_name(nid)
+                if name is None:
+                    continue
+                names[nid] = name
+                if won:
+                    name.rep_wins += 1
+                else:
+                    name.rep_losses += 1
+
+        for c in (w, l):
+            pool.update_combo(profile_id, c)
+        prefgraph.record_vote(profile_id, winner_key, loser_key)
+        for n in names.values():
+            pool.update_name(n.id, n.rep_wins, n.rep_losses)
+
+
+def _round_results(keys, ordered: bool):
+    """
+    (winner, loser) pairs a round implies, in the order they are rated:
+    keys[0] over each of the others, or — for a full ordering, best
+    first — every earlier combo over every later one.
+    """
+    if not ordered:
+        return [(keys[0], k) for k in keys[1:]]
+    return [(keys[i], k) for i in range(len(keys)) for k in keys[i + 1 :]]
+
+
+def _skip_in_memory(profile_id: int, key_a: ComboKey, key_b: ComboKey):
+    with pool.pool_lock:
+        for key in (key_a, key_b):
+            c = pool.find_combo(profile_id, key)
+            # Cooling a default (e.g. virtual) combo changes nothing
+            if c.match_count or c.streak or c.glicko_rd < glicko.DEFAULT_RD:
+                _cool(c)
+                pool.update_combo(profile_id, c)
+
+
+# ── Journal ────────────────────────────────────────────────────────────────────
+
+_journal: VoteJournal | None = None
+_flusher: threading.Thread | None = None
+_flusher_lock = threading.Lock()
+_flush_due = threading.Event()
+_flush_error: str | None = None
+_flush_listeners: list = []
+
+log = logging.getLogger(__name__)
+
+
+def _get_journal() -> VoteJournal:
+    if _journal is None:
+        recover_votes()
+    return _journal
+
+
+def recover_votes() -> int:
+    """
+    Open the vote journal and apply anything a previous run left unflushed.
+    Called once at startup after init_db(); returns the number recovered.
+    """
+    global _journal
+    path = db.DB_PATH.parent / "pending_votes.jsonl"
+    applied = int(get_setting(JOURNAL_SEQ_KEY) or 0)
+    leftover = VoteJournal.read_unapplied(path, applied)
+    _journal = VoteJournal(path, applied_seq=applied)
+    _journal.adopt(leftover)
+    return _journal.flush(_apply_batch)
+
+
+def flush_votes() -> int:
+    """Write every pending vote to the database now; returns how many."""
+    if _journal is None:
+        return 0
+    return _journal.flush(_apply_batch)
+
+
+def request_flush():
+    """Flush pending votes soon on the vote-flush worker, without waiting."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_worker, name="vote-flush", daemon=True
+            )
+            _flusher.start()
+    _flush_due.set()
+
+
+def on_flush_status(listener):
+    """
+    Register a callable run on the vote-flush worker when a background
+    flush fails, with the failure message, and with None once one succeeds
+    again.
+    """
+    _flush_listeners.append(listener)
+
+
+def _flush_worker():
+    global _flush_error
+    while True:
+        _flush_due.wait()
+        _flush_due.clear()
+        try:
+            flush_votes()
+            error = None
+        except Exception as exc:  # entries stay queued; the next flush retries them
+            error = f"{type(exc).__name__}: {exc}"
+            if _flush_error is None:  # once per failure streak
+                log.exception("Flushing pending votes failed")
+        if (error is None) != (_flush_error is None):
+            for listener in _flush_listeners:
+                listener(error)
+        _flush_error = error
+
+
+def _submit(kind: str, profile_id: int, **fields):
+    entry = {
+        "kind": kind,
+        "profile_id": profile_id,
+        **fields,
+        "ts": datetime.utcnow().isoformat(),
+    }
+    if _get_journal().submit(entry):
+        request_flush()
+
+
+atexit.register(flush_votes)
+# A pool must never load rows that are missing journaled votes
+pool.before_load(flush_votes)
+prefgraph.before_load(flush_votes)
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+
+def update_elo(profile_id: int, winner_key: ComboKey, loser_key: ComboKey):
+    """Apply Elo update, update streaks, update name reputations, record match."""
+    _vote_in_memory(profile_id, winner_key, loser_key)
+    _submit("vote", profile_id, a=list(winner_key), b=list(loser_key))
+
+
+def update_round(profile_id: int, keys: list[ComboKey], ordered: bool = False):
+    """
+    Record a round of N: keys[0] is the winner, or with `ordered` the whole
+    list runs best to worst. Every implied pairwise result is rated and
+    logged, and the round reaches the database in a single transaction.
+    """
+    if len(keys) < 2:
+        return
+    with pool.pool_lock:
+        for winner_key, loser_key in _round_results(keys, ordered):
+            _vote_in_memory(profile_id, winner_key, loser_key)
+    _submit("round", profile_id, keys=[list(k) for k in keys], ordered=ordered)
+
+
+def record_skip(profile_id: int, key_a: ComboKey, key_b: ComboKey):
+    """Record a skip — nudge match_count down, cool streaks slightly."""
+    _skip_in_memory(profile_id, key_a, key_b)
+    _submit("skip", profile_id, a=list(key_a), b=list(key_b))
@@ -0,0 +1,53 @@
+"""
+Sorted Elo index — combos ordered by rating for nearest-to-target lookups.
+
+Entries are (elo_score, combo key) tuples in a sorted list; bisect finds
+the insertion point for a target Elo and the nearest neighbours are read
+outward from there, so an opponent search is a binary search instead of
+a scan over every candidate.
+"""
+
+from bisect import bisect_left, insort
+
+
+class EloIndex:
+    def __init__(self):
+        self._entries: list[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key, elo: float):
+        insort(self._entries, (elo, key))
+
+    def remove(self, key, elo: float):
+        i = bisect_left(self._entries, (elo, key))
+        if i < len(self._entries) and self._entries[i] == (elo, key):
+            del self._entries[i]
+
+    def move(self, key, old_elo: float, new_elo: float):
+        if old_elo != new_elo:
+            self.remove(key, old_elo)
+            self.add(key, new_elo)
+
+    def top(self, n: int) -> list:
+        """Keys of the `n` highest-rated entries, best first."""
+        return [key for _, key in reversed(self._entries[-n:])] if n > 0 else []
+
+    def nearest(self, target: float, exclude=()):
+        """Combo whose Elo is closest to `target`, skipping `exclude`; or None."""
+        entries = self._entries
+        hi = bisect_left(entries, (target,))
+        lo = hi - 1
+        n = len(entries)
+        while lo >= 0 or hi < n:
+            below = target - entries[lo][0] if lo >= 0 else None
+            if hi >= n or (below is not None and below <= entries[hi][0] - target):
+                key = entries[lo][1]
+                lo -= 1
+            else:
+                key = entries[hi][1]
+                hi += 1
+            if key not in exclude:
+                return key
+        return None
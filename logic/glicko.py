@@ -0,0 +1,93 @@
+"""
+Glicko-2 ratings — Elo plus a measure of how sure we are of it.
+
+Every combo carries a rating (glicko_score, on the same scale as Elo), a
+rating deviation (glicko_rd: ~350 for an unknown combo, shrinking as it
+plays) and a volatility (glicko_vol: how erratic its results have been).
+Each vote is treated as its own rating period, following Glickman's
+"Example of the Glicko-2 system"; a skip is a period without a result,
+which only widens the deviation.
+
+rate() and idle() work on anything with those three attributes — ORM rows
+and resident pool states alike — exactly like logic/elo._rate.
+"""
+
+import math
+
+DEFAULT_RD = 350.0
+DEFAULT_VOL = 0.06
+TAU = 0.5  # constrains volatility change; 0.3–1.2 per Glickman
+CONFIDENCE_Z = 1.96  # 95% intervals
+
+_SCALE = 400.0 / math.log(10.0)  # Glicko-2 internal units ↔ rating points
+_CENTER = 1000.0  # DEFAULT_ELO, the unrated combo
+_EPSILON = 1e-6
+_MAX_PHI = DEFAULT_RD / _SCALE
+
+
+def _g(phi: float) -> float:
+    return 1.0 / math.sqrt(1.0 + 3.0 * phi * phi / (math.pi * math.pi))
+
+
+def _volatility(phi: float, sigma: float, delta: float, v: float) -> float:
+    """New volatility by the Illinois iteration (step 5 of Glickman's paper)."""
+    a = math.log(sigma * sigma)
+    tau2 = TAU * TAU
+
+    def f(x):
+        ex = math.exp(x)
+        d = phi * phi + v + ex
+        return (
+            ex * (delta * delta - phi * phi - v - ex) / (2.0 * d * d) - (x - a) / tau2
+        )
+
+    big_a = a
+    if delta * delta > phi * phi + v:
+        big_b = math.log(delta * delta - phi * phi - v)
+    else:
+        k = 1
+        while f(a - k * TAU) < 0:
+            k += 1
+        big_b = a - k * TAU
+    fa, fb = f(big_a), f(big_b)
+    while abs(big_b - big_a) > _EPSILON:
+        big_c = big_a + (big_a - big_b) * fa / (fb - fa)
+        fc = f(big_c)
+        if fc * fb <= 0:
+            big_a, fa = big_b, fb
+        else:
+            fa /= 2.0
+        big_b, fb = big_c, fc
+    return math.exp(big_a / 2.0)
+
+
+def _update(mu, phi, sigma, mu_j, phi_j, score):
+    g = _g(phi_j)
+    e = 1.0 / (1.0 + math.exp(-g * (mu - mu_j)))
+    v = 1.0 / (g * g * e * (1.0 - e))
+    delta = v * g * (score - e)
+    sigma = _volatility(phi, sigma, delta, v)
+    phi_star = math.sqrt(phi * phi + sigma * sigma)
+    phi = 1.0 / math.sqrt(1.0 / (phi_star * phi_star) + 1.0 / v)
+    mu += phi * phi * g * (score - e)
+    return mu, min(phi, _MAX_PHI), sigma
+
+
+def rate(w, l):  # noqa: E741
+    """Glicko-2 update of both combos for one vote (`w` beat `l`)."""
+    mu_w, phi_w = (w.glicko_score - _CENTER) / _SCALE, w.glicko_rd / _SCALE
+    mu_l, phi_l = (l.glicko_score - _CENTER) / _SCALE, l.glicko_rd / _SCALE
+    for combo, (mu, phi, sigma) in (
+        (w, _update(mu_w, phi_w, w.glicko_vol, mu_l, phi_l, 1.0)),
+        (l, _update(mu_l, phi_l, l.glicko_vol, mu_w, phi_w, 0.0)),
+    ):
+        combo.glicko_score = _CENTER + mu * _SCALE
+        combo.glicko_rd = phi * _SCALE
+        combo.glicko_vol = sigma
+
+
+def idle(combo):
+    """A rating period without a result: the deviation grows, capped at default."""
+    phi = combo.glicko_rd / _SCALE
+    phi = math.sqrt(phi * phi + combo.glicko_vol * combo.glicko_vol)
+    combo.glicko_rd = min(phi, _MAX_PHI) * _SCALE
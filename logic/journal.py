@@ -0,0 +1,89 @@
+"""
+Write-behind vote journal.
+
+Votes and skips are appended to a small JSON-lines file (no fsync) and
+held in memory until flushed; a flush hands the whole batch to one
+database transaction. Every entry has a sequence number, and the flush
+transaction records the last applied number, so replaying the file after
+a crash never applies a vote twice.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+
+class VoteJournal:
+    def __init__(self, path: Path, applied_seq: int = 0, batch_size: int = 25):
+        self.path = path
+        self.batch_size = batch_size
+        self._seq = applied_seq
+        self._pending: list[dict] = []
+        self._lock = threading.Lock()  # guards _pending, _seq and the file
+        self._flush_lock = threading.Lock()  # one batch reaches the DB at a time
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # ── Recovery ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def read_unapplied(path: Path, applied_seq: int) -> list[dict]:
+        """Entries left in the file by a previous run that never reached the DB."""
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                if entry.get("seq", 0) > applied_seq:
+                    entries.append(entry)
+        return entries
+
+    def adopt(self, entries: list[dict]):
+        """Queue recovered entries ahead of anything new."""
+        with self._lock:
+            self._pending[:0] = entries
+            if entries:
+                self._seq = max(self._seq, entries[-1]["seq"])
+
+    # ── Write path ────────────────────────────────────────────────────────────
+
+    def submit(self, entry: dict) -> bool:
+        """Append an entry; returns True once a batch is due for flushing."""
+        with self._lock:
+            self._seq += 1
+            entry = {"seq": self._seq, **entry}
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            self._pending.append(entry)
+            return len(self._pending) >= self.batch_size
+
+    def flush(self, apply):
+        """
+        Pass all pending entries to `apply(entries)` (one transaction).
+        Entries stay queued if it raises, so the next flush retries them.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+            apply(batch)
+            with self._lock:
+                del self._pending[: len(batch)]
+                self._rewrite()
+            return len(batch)
+
+    def _rewrite(self):
+        """Shrink the file to whatever is still pending (usually nothing)."""
+        self._file.close()
+        with open(self.path, "w", encoding="utf-8") as f:
+            for entry in self._pending:
+                f.write(json.dumps(entry) + "\n")
+        self._file = open(self.path, "a", encoding="utf-8")
@@ -0,0 +1,203 @@
+"""
+Leaderboard data access — top combos for one profile or combined across
+all of them, shared by the leaderboard and combo screens.
+
+Each call is a single statement: played combos (joined straight to both
+names, gender filter on their precomputed gender_mask; Combined reads the
+materialized CombinedScore table) UNION ALL a bounded slice of virtual combos
+(unplayed pairs at the default Elo), ordered and limited together. There
+are no per-row name lookups, so a table always costs one query no matter
+how many rows it shows. Pages are keyset-paged from the previous page's
+last row, so a page deep in the ranking costs the same as the first.
+"""
+
+from sqlalchemy import (
+    Float,
+    and_,
+    exists,
+    literal,
+    null,
+    or_,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.orm import aliased
+
+from database.db import session_scope
+from database.models import CombinedScore, Name, NameCombo
+from logic.glicko import CONFIDENCE_Z, DEFAULT_RD
+from logic.pool import DEFAULT_ELO, gender_enums, gender_masks
+
+
+def _columns(first, middle, score, margin, played: int):
+    return (
+        first.id.label("first_id"),
+        middle.id.label("middle_id"),
+        first.text.label("first"),
+        middle.text.label("middle"),
+        score.label("score"),
+        margin.label("margin"),
+        literal(played).label("played"),
+    )
+
+
+def _played(
+    profile_ids: list[int],
+    source: str,
+    aggregate: str,
+    gender_mode,
+    after,
+    first,
+    middle,
+):
+    """
+    Played combos ranked after the row `after` (or from the top), best
+    first, ties broken by (first_id, middle_id).
+    """
+    masks = gender_masks(gender_mode)
+    if len(profile_ids) == 1:
+        # Walks ix_combo_profile_<source> in order and stops at the limit
+        score = NameCombo.score_column(source)
+        if source == "glicko":
+            margin = NameCombo.glicko_rd * CONFIDENCE_Z
+        else:
+            margin = null()
+        q = select(*_columns(first, middle, score, margin, 1)).where(
+            NameCombo.profile_id == profile_ids[0]
+        )
+        if masks is not None:
+            q = q.where(NameCombo.gender_mask.in_(masks))
+        on_first = first.id == NameCombo.first_id
+        on_middle = middle.id == NameCombo.middle_id
+    else:
+        # Materialized cross-profile score (logic/combined, already built
+        # from the active source); walks ix_combined_*
+        score = getattr(CombinedScore, f"score_{aggregate}")
+        q = select(*_columns(first, middle, score, null(), 1))
+        if masks is not None:
+            q = q.where(CombinedScore.gender_mask.in_(masks))
+        on_first = first.id == CombinedScore.first_id
+        on_middle = middle.id == CombinedScore.middle_id
+    if after is not None:
+        # A range bound on the index first, then skip the ties already shown;
+        # played rows all rank before a virtual row at the same score
+        _, _, after_score, _, after_played, *after_ids = after
+        q = q.where(score <= after_score)
+        if after_played:
+            q = q.where(
+                or_(score < after_score, tuple_(first.id, middle.id) > tuple(after_ids))
+            )
+        else:
+            q = q.where(score < after_score)
+    return (
+        q.join(first, on_first)
+        .join(middle, on_middle)
+        .order_by(score.desc(), first.id, middle.id)
+    )
+
+
+def _virtual(
+    profile_ids: list[int],
+    source: str,
+    aggregate: str,
+    gender_mode,
+    after,
+    first,
+    middle,
+):
+    """
+    Ordered pairs played in none of `profile_ids`, at the default Elo,
+    ranked after the row `after` (or from the top). None once `after`
+    ranks below the default Elo, since then every virtual pair came before.
+    """
+    if after is not None and after[2] < DEFAULT_ELO:
+        return None
+    if len(profile_ids) == 1 and source == "glicko":
+        margin = literal(DEFAULT_RD * CONFIDENCE_Z, Float)
+    else:
+        margin = null()
+    if len(profile_ids) == 1:
+        played = exists().where(
+            and_(
+                NameCombo.profile_id == profile_ids[0],
+                NameCombo.first_id == first.id,
+                NameCombo.middle_id == middle.id,
+            )
+        )
+    else:
+        played = exists().where(
+            and_(
+                CombinedScore.first_id == first.id,
+                CombinedScore.middle_id == middle.id,
+            )
+        )
+    q = select(*_columns(first, middle, literal(DEFAULT_ELO), margin, 0)).where(
+        first.id != middle.id, ~played
+    )
+    if gender_mode is not None:
+        # No combo row to carry a mask, so filter the names themselves
+        genders = gender_enums(gender_mode)
+        q = q.where(first.gender.in_(genders), middle.gender.in_(genders))
+    if after is not None:
+        _, _, after_score, _, after_played, *after_ids = after
+        if after_score == DEFAULT_ELO and not after_played:
+            q = q.where(tuple_(first.id, middle.id) > tuple(after_ids))
+    return q.order_by(first.id, middle.id)
+
+
+def top_combos(
+    profile_ids: list[int],
+    gender_mode: str | None,
+    limit: int,
+    aggregate: str = "mean",
+    after: tuple | None = None,
+    source: str = "elo",
+) -> list[tuple[str, str, float, float | None, bool, int, int]]:
+    """
+    The next `limit` ranked (first, middle, score, margin, played, first_id,
+    middle_id) rows after the row `after` (None starts from the top) for
+    one profile, or — given several — the Combined ranking across all
+    profiles under `aggregate` (see COMBINED_AGGREGATES). Single profiles
+    rank by `source` (see SCORE_SOURCES); Combined by whatever source its
+    table was last built from. `margin` is the half-width of the score's
+    95% confidence interval where the source has one (Glicko), else None.
+    `gender_mode` "M"/"F" restricts both names to that gender or neutral;
+    None means no filter. The order is total, so consecutive pages never
+    overlap or skip.
+    """
+    parts = []
+    for build in (_played, _virtual):
+        first = aliased(Name)
+        middle = aliased(Name)
+        q = build(profile_ids, source, aggregate, gender_mode, after, first, middle)
+        if q is None:
+            continue
+        part = q.limit(limit).subquery()
+        parts.append(select(*part.c))
+
+    u = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    stmt = (
+        select(
+            u.c.first,
+            u.c.middle,
+            u.c.score,
+            u.c.margin,
+            u.c.played,
+            u.c.first_id,
+            u.c.middle_id,
+        )
+        .order_by(
+            u.c.score.desc(),
+            u.c.played.desc(),  # played first on ties
+            u.c.first_id,
+            u.c.middle_id,
+        )
+        .limit(limit)
+    )
+    with session_scope() as s:
+        rows = s.execute(stmt).all()
+    return [
+        (first, middle, float(score), margin, bool(played), first_id, middle_id)
+        for first, middle, score, margin, played, first_id, middle_id in rows
+    ]
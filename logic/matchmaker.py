@@ -25,41 +25,86 @@ Dark horse
 ──────────
   With probability = match_random_pct, skip all of the above and pick
   two combos at random. Keeps the long tail alive.
+
+Active learning (Settings.match_strategy = "active")
+────────────────────────────────────────────────────
+  Instead of the heuristics above (and the dark horse), pick the pair
+  whose result is expected to teach the most about which combos belong
+  in the top K. Each combo's Glicko rating and deviation give it a
+  chance of sitting on the other side of the top-K cut than its rating
+  says; a vote is worth the variance it removes, weighted by that
+  chance, summed over both combos. Only a bounded candidate set is
+  scored — the 2K best-rated combos plus a sample drawn by uncertainty
+  (virtual combos included) — so a pick stays O(K) however large the
+  pool grows.
+
+Virtual combos
+──────────────
+  Unplayed combos have no row (see logic/pool). They take part in every
+  stage as implicit Elo-1000, zero-match combos, and a pair is identified
+  by ComboKey (first_id, middle_id) rather than a row id.
+
+Cooldowns
+─────────
+  Whichever strategy runs, the pair it proposes is checked against the
+  profile's recent-pair memory (logic/recent): a pair served lately, or
+  one reusing names from the last few rounds, is redrawn — up to
+  RECENT_TRIES candidates, keeping the least-repeated one. Picking does
+  not start a cooldown; mark_shown() does, once the pair is on screen.
+  Pairs picked in one batch are also kept apart from each other.
+
+Transitive inference
+────────────────────
+  The profile's preference graph (logic/prefgraph) knows which results
+  the votes so far already imply: a pair whose winner follows from at
+  most implied_depth earlier wins counts as a repeat. With probability
+  cycle_match_pct, the pair is instead drawn from inside a component of
+  contradictory results, where a direct comparison settles the most.
+
+Rounds of N
+───────────
+  With Settings.round_size above 2, a match shows several combos and the
+  user picks the best. pick_combo_round builds one from successive pair
+  picks — each pair competitive on its own — keeping the first N
+  distinct combos, so every rule above still shapes who meets whom.
+
+Randomness
+──────────
+  Every draw goes through an explicit `rng` — anything with a random()
+  method, `random` itself by default. Pass a seeded random.Random and the
+  same pool state yields the same pair sequence, so a session or a
+  benchmark run can be replayed exactly.
+
+  pick_combo_pairs draws its batch one pick at a time, not as one
+  np.random.Generator array. Each pick is a chain of sampler descents
+  whose length depends on the draws before it, and it is steered away
+  from the pairs already in the batch. So the k-th pick cannot be
+  drawn before the (k-1)-th is known. The batch saves lock and lookup
+  round-trips, not draws.
 """
 
+import math
 import random
-import statistics
-
-from database.db import get_session, get_setting
-from database.models import Gender, Name, NameCombo
-
-# ── Gender helpers ─────────────────────────────────────────────────────────────
-
-
-def _gender_enums(gender_mode: str) -> list[Gender]:
-    if gender_mode == "M":
-        return [Gender.M, Gender.N]
-    elif gender_mode == "F":
-        return [Gender.F, Gender.N]
-    return [Gender.M, Gender.F, Gender.N]
 
+from database.db import settings
+from logic.pool import (
+    DEFAULT_ELO,
+    VIRTUAL_WEIGHT,
+    ComboKey,
+    ComboPool,
+    ComboState,
+    get_pool,
+    pool_lock,
+)
+from logic.prefgraph import preference_graph
+from logic.recent import REPEAT_PENALTY, RecentMemory, recent_memory
+
+RECENT_TRIES = 8  # candidate pairs drawn per pick while avoiding repeats
+MAX_ROUND = 6  # most combos one round may show
 
 # ── Weight helpers ─────────────────────────────────────────────────────────────
 
 
-def _combo_weight(combo: NameCombo) -> float:
-    """Under-played bonus × streak multiplier."""
-    underplayed = 1.0 / (combo.match_count + 1)
-    s = combo.streak
-    if s > 0:
-        streak_mult = 1.0 + 0.3 * s  # 1.3 … 2.5
-    elif s < 0:
-        streak_mult = max(0.25, 1.0 + 0.15 * s)  # 0.85 … 0.25
-    else:
-        streak_mult = 1.0
-    return underplayed * streak_mult
-
-
 def _reach(streak: int) -> float:
     """How far above anchor Elo (in std-devs) we target for opponent."""
     if streak <= 0:
@@ -76,138 +121,315 @@ def _reach(streak: int) -> float:
 
 
 def _pick_featured_name(
-    eligible_name_ids: set[int],
-    all_names_by_id: dict[int, Name],
-    exclude_id: int | None = None,
+    pool: ComboPool,
+    exclude_ids: tuple[int, ...] = (),
+    rng=random,
 ) -> int | None:
-    """Pick a name ID weighted by reputation. Exclude one ID if given."""
-    pool = [
-        nid for nid in eligible_name_ids if nid != exclude_id and nid in all_names_by_id
-    ]
-    if not pool:
-        return None
-    weights = [all_names_by_id[nid].reputation for nid in pool]
-    return random.choices(pool, weights=weights, k=1)[0]
+    """Pick a name ID weighted by reputation, skipping any excluded IDs."""
+    return pool.name_sampler.sample_excluding(exclude_ids, rng)
 
 
 def _pick_anchor_combo(
-    combos_by_name: dict[int, list[NameCombo]],
+    pool: ComboPool,
     featured_name_id: int,
-) -> NameCombo | None:
+    rng=random,
+) -> ComboState | None:
     """From combos featuring the chosen name, pick one by combo weight."""
-    candidates = combos_by_name.get(featured_name_id, [])
-    if not candidates:
+    sampler = pool.combo_samplers.get(featured_name_id)
+    played = sampler.total() if sampler is not None else 0.0
+    virtual = pool.virtual_count(featured_name_id) * VIRTUAL_WEIGHT
+    if played + virtual <= 0.0:
         return None
-    weights = [_combo_weight(c) for c in candidates]
-    return random.choices(candidates, weights=weights, k=1)[0]
+    if rng.random() * (played + virtual) >= played:
+        return pool.random_virtual(featured_name_id, rng)
+    return pool.combos[sampler.sample(rng)]
+
+
+def _nearest(
+    pool: ComboPool,
+    name_id: int | None,
+    target_elo: float,
+    exclude: ComboKey,
+    rng=random,
+) -> ComboState | None:
+    """
+    Combo closest to target Elo — among one name's combos, or all of them.
+    Played combos come from the sorted Elo index; unplayed ones all sit at
+    the default Elo, so one virtual candidate stands in for the lot.
+    """
+    index = pool.elo_index if name_id is None else pool.name_elo.get(name_id)
+    key = index.nearest(target_elo, (exclude,)) if index is not None else None
+    best = pool.combos[key] if key is not None else None
+
+    if name_id is None:
+        has_virtual = len(pool.combos) < pool.combo_count()
+    else:
+        has_virtual = pool.virtual_count(name_id) > 0
+    if has_virtual and (
+        best is None or abs(DEFAULT_ELO - target_elo) < abs(best.elo_score - target_elo)
+    ):
+        virtual = pool.random_virtual(name_id, rng)
+        if virtual is not None and virtual.key != exclude:
+            return virtual
+    return best
 
 
 def _pick_opponent_combo(
-    anchor: NameCombo,
-    eligible_name_ids: set[int],
-    all_names_by_id: dict[int, Name],
-    combos_by_name: dict[int, list[NameCombo]],
-    all_combos: list[NameCombo],
+    anchor: ComboState,
+    pool: ComboPool,
     std: float,
-) -> NameCombo | None:
+    rng=random,
+) -> ComboState | None:
     """
     Pick an opponent:
       1. Choose an opposing featured name by reputation (excluding anchor names).
       2. From that name's combos, pick the one closest in Elo to our target.
       3. Fallback: any combo not equal to anchor, closest to target Elo.
+    Both lookups are binary searches on the pool's sorted Elo indexes.
     """
-    exclude = {anchor.first_id, anchor.middle_id}
-    opp_pool = [
-        nid
-        for nid in eligible_name_ids
-        if nid not in exclude and nid in all_names_by_id
-    ]
-
     target_elo = anchor.elo_score + _reach(anchor.streak) * std
 
-    if opp_pool:
-        opp_weights = [all_names_by_id[nid].reputation for nid in opp_pool]
-        opp_name_id = random.choices(opp_pool, weights=opp_weights, k=1)[0]
-        candidates = [
-            c for c in combos_by_name.get(opp_name_id, []) if c.id != anchor.id
-        ]
-        if candidates:
-            return min(candidates, key=lambda c: abs(c.elo_score - target_elo))
+    opp_name_id = _pick_featured_name(pool, anchor.key, rng)
+    if opp_name_id is not None:
+        opponent = _nearest(pool, opp_name_id, target_elo, anchor.key, rng)
+        if opponent is not None:
+            return opponent
 
     # Fallback — any combo, closest Elo to target
-    fallback = [c for c in all_combos if c.id != anchor.id]
-    if not fallback:
+    return _nearest(pool, None, target_elo, anchor.key, rng)
+
+
+# ── Active learning ────────────────────────────────────────────────────────────
+
+STRATEGIES = ("classic", "active")
+ACTIVE_SAMPLES = 48  # uncertainty-weighted candidates per pick, besides the top 2K
+
+_Q = math.log(10.0) / 400.0
+
+
+def _g(rd: float) -> float:
+    return 1.0 / math.sqrt(1.0 + 3.0 * _Q * _Q * rd * rd / (math.pi * math.pi))
+
+
+def _boundary(pool: ComboPool, k: int) -> float:
+    """Rating at the top-K cut. Unplayed combos all sit at the default."""
+    top = pool.glicko_index.top(k)
+    has_virtual = len(pool.combos) < pool.combo_count()
+    if not top:
+        return DEFAULT_ELO
+    kth = pool.combos[top[-1]].glicko_score
+    if has_virtual and (len(top) < k or kth < DEFAULT_ELO):
+        return DEFAULT_ELO  # the cut falls among the unplayed combos
+    return kth
+
+
+def _relevance(combo: ComboState, boundary: float) -> float:
+    """Chance the combo is really on the other side of the cut (0 … 0.5)."""
+    z = abs(combo.glicko_score - boundary) / combo.glicko_rd
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def _variance_drop(combo: ComboState, opponent: ComboState) -> float:
+    """How much one game against `opponent` shrinks the combo's RD²."""
+    g = _g(opponent.glicko_rd)
+    e = 1.0 / (1.0 + math.exp(-g * _Q * (combo.glicko_score - opponent.glicko_score)))
+    var = combo.glicko_rd * combo.glicko_rd
+    return var - 1.0 / (1.0 / var + _Q * _Q * g * g * e * (1.0 - e))
+
+
+def _active_candidates(pool: ComboPool, k: int, rng=random) -> list[ComboState]:
+    seen = {}
+    for key in pool.glicko_index.top(2 * k):
+        seen[key] = pool.combos[key]
+    for _ in range(ACTIVE_SAMPLES):
+        name_id = _pick_featured_name(pool, (), rng)
+        if name_id is None:
+            continue
+        combo = _pick_anchor_combo(pool, name_id, rng)
+        if combo is not None:
+            seen.setdefault(combo.key, combo)
+    return list(seen.values())
+
+
+def _active_pair(
+    pool: ComboPool, k: int, rng=random
+) -> tuple[ComboKey, ComboKey] | None:
+    """
+    A high-gain pair about the top K: the anchor is drawn in proportion to
+    its own promise (relevance × RD²) — sampled rather than maximised, so
+    prefetched picks differ — and faces the candidate with the best
+    expected gain for the pair.
+    """
+    candidates = _active_candidates(pool, k, rng)
+    if len(candidates) < 2:
         return None
-    return min(fallback, key=lambda c: abs(c.elo_score - target_elo))
+    boundary = _boundary(pool, k)
+    relevance = {c.key: _relevance(c, boundary) for c in candidates}
+    promise = [relevance[c.key] * c.glicko_rd * c.glicko_rd for c in candidates]
+
+    x = rng.random() * sum(promise)
+    anchor = candidates[-1]
+    for combo, p in zip(candidates, promise):
+        x -= p
+        if x < 0:
+            anchor = combo
+            break
+
+    own = relevance[anchor.key]
+    best, best_gain = None, -1.0
+    for opponent in candidates:
+        if opponent.key == anchor.key:
+            continue
+        gain = own * _variance_drop(anchor, opponent)
+        gain += relevance[opponent.key] * _variance_drop(opponent, anchor)
+        if gain > best_gain:
+            best, best_gain = opponent, gain
+    return anchor.key, best.key
 
 
 # ── Public API ─────────────────────────────────────────────────────────────────
 
 
-def pick_combo_pair(profile_id: int, gender_mode: str) -> tuple[int, int] | None:
+def pick_combo_pair(
+    profile_id: int, gender_mode: str, rng=random
+) -> tuple[ComboKey, ComboKey] | None:
     """
-    Return (combo_id_a, combo_id_b) for the next match.
+    Return (combo_key_a, combo_key_b) for the next match.
     Returns None if fewer than 2 eligible combos exist.
     """
-    eligible_genders = _gender_enums(gender_mode)
-
-    with get_session() as s:
-        eligible_name_ids = set(
-            n.id for n in s.query(Name).filter(Name.gender.in_(eligible_genders)).all()
-        )
-        all_names_by_id = {
-            n.id: n for n in s.query(Name).filter(Name.id.in_(eligible_name_ids)).all()
-        }
-        all_combos: list[NameCombo] = (
-            s.query(NameCombo)
-            .filter(
-                NameCombo.profile_id == profile_id,
-                NameCombo.first_id.in_(eligible_name_ids),
-                NameCombo.middle_id.in_(eligible_name_ids),
-            )
-            .all()
-        )
-
-    if len(all_combos) < 2:
+    with pool_lock:
+        return _pick_from_pool(get_pool(profile_id, gender_mode), settings(), rng)
+
+
+def pick_combo_pairs(
+    profile_id: int, gender_mode: str, n: int, rng=random
+) -> list[tuple[ComboKey, ComboKey]]:
+    """
+    Up to `n` distinct pairs in one call — one lock, one pool lookup, one
+    settings read — all drawn from the current ratings. Fewer come back
+    if the pool is too small to offer that many different pairs.
+    """
+    pairs: list[tuple[ComboKey, ComboKey]] = []
+    seen: set[frozenset] = set()
+    with pool_lock:
+        pool = get_pool(profile_id, gender_mode)
+        cfg = settings()
+        batch = _batch_memory(cfg)
+        for _ in range(4 * n):  # bounded retries for repeats
+            if len(pairs) >= n:
+                break
+            pair = _pick_from_pool(pool, cfg, rng, batch)
+            if pair is None:
+                break
+            if frozenset(pair) not in seen:
+                seen.add(frozenset(pair))
+                pairs.append(pair)
+                batch.remember(pair)
+    return pairs
+
+
+def pick_combo_round(
+    profile_id: int, gender_mode: str, size: int, rng=random
+) -> tuple[ComboKey, ...] | None:
+    """
+    Up to `size` distinct combos (at most MAX_ROUND) for one round, drawn
+    as successive pairs. Returns None if fewer than 2 eligible combos exist.
+    """
+    size = max(2, min(MAX_ROUND, size))
+    chosen: dict[ComboKey, None] = {}  # insertion-ordered set
+    with pool_lock:
+        pool = get_pool(profile_id, gender_mode)
+        cfg = settings()
+        batch = _batch_memory(cfg)
+        for _ in range(2 * size):  # bounded retries for repeats
+            if len(chosen) >= size:
+                break
+            pair = _pick_from_pool(pool, cfg, rng, batch)
+            if pair is None:
+                break
+            chosen.update(dict.fromkeys(pair))
+            batch.remember(pair)
+    if len(chosen) < 2:
         return None
+    return tuple(chosen)[:size]
+
+
+def mark_shown(profile_id: int, combos: tuple[ComboKey, ...]):
+    """Start the cooldowns for a pair or round now shown to the user."""
+    with pool_lock:
+        recent_memory(profile_id, settings()).remember(combos)
+
+
+def _batch_memory(cfg) -> RecentMemory:
+    """Scratch memory keeping the picks of one batch apart from each other."""
+    batch = RecentMemory()
+    batch.configure(cfg.recent_pairs, cfg.recent_names, 0)
+    return batch
 
-    # Dark horse — fully random
-    rand_pct = int(get_setting("match_random_pct") or 25) / 100.0
-    if random.random() < rand_pct:
-        a, b = random.sample(all_combos, 2)
-        return a.id, b.id
 
-    # Build name → combos index
-    combos_by_name: dict[int, list[NameCombo]] = {}
-    for c in all_combos:
-        combos_by_name.setdefault(c.first_id, []).append(c)
-        combos_by_name.setdefault(c.middle_id, []).append(c)
+def _random_pair(pool: ComboPool, rng=random) -> tuple[ComboKey, ComboKey]:
+    a = pool.random_combo(rng)
+    b = a
+    while b.key == a.key:
+        b = pool.random_combo(rng)
+    return a.key, b.key
+
+
+def _pick_from_pool(
+    pool: ComboPool, cfg, rng=random, batch: RecentMemory | None = None
+) -> tuple[ComboKey, ComboKey] | None:
+    if pool.combo_count() < 2:
+        return None
+
+    memory = recent_memory(pool.profile_id, cfg)
+    graph = None
+    if cfg.implied_depth or cfg.cycle_match_pct:
+        graph = preference_graph(pool.profile_id)
+    best, best_penalty = None, None
+    for _ in range(RECENT_TRIES):
+        pair = None
+        if graph is not None and rng.random() < cfg.cycle_match_pct / 100.0:
+            pair = graph.cyclic_pair(pool, rng)
+        if pair is None:
+            pair = _draw_pair(pool, cfg, rng)
+        penalty = memory.penalty(pair)
+        if batch is not None:
+            penalty += batch.penalty(pair)
+        if cfg.implied_depth and graph.implied(*pair, cfg.implied_depth):
+            penalty += REPEAT_PENALTY  # the result is already known
+        if best is None or penalty < best_penalty:
+            best, best_penalty = pair, penalty
+        if not penalty:
+            break
+    return best
+
+
+def _draw_pair(pool: ComboPool, cfg, rng=random) -> tuple[ComboKey, ComboKey]:
+    """One candidate pair from the configured strategy."""
+    if cfg.match_strategy == "active":
+        pair = _active_pair(pool, cfg.active_top_k, rng)
+        if pair is not None:
+            return pair
+
+    # Dark horse — fully random
+    rand_pct = cfg.match_random_pct / 100.0
+    if rng.random() < rand_pct:
+        return _random_pair(pool, rng)
 
-    scores = [c.elo_score for c in all_combos]
-    std = statistics.stdev(scores) if len(scores) >= 2 else 100.0
+    std = pool.elo_std()
 
     # Stage 1+2: anchor
-    anchor_name_id = _pick_featured_name(eligible_name_ids, all_names_by_id)
+    anchor_name_id = _pick_featured_name(pool, (), rng)
     if anchor_name_id is None:
-        a, b = random.sample(all_combos, 2)
-        return a.id, b.id
+        return _random_pair(pool, rng)
 
-    anchor = _pick_anchor_combo(combos_by_name, anchor_name_id)
+    anchor = _pick_anchor_combo(pool, anchor_name_id, rng)
     if anchor is None:
-        a, b = random.sample(all_combos, 2)
-        return a.id, b.id
+        return _random_pair(pool, rng)
 
     # Stage 3: opponent
-    opponent = _pick_opponent_combo(
-        anchor,
-        eligible_name_ids,
-        all_names_by_id,
-        combos_by_name,
-        all_combos,
-        std,
-    )
+    opponent = _pick_opponent_combo(anchor, pool, std, rng)
     if opponent is None:
-        fallback = [c for c in all_combos if c.id != anchor.id]
-        opponent = random.choice(fallback)
+        return _random_pair(pool, rng)
 
-    return anchor.id, opponent.id
+    return anchor.key, opponent.key
@@ -0,0 +1,402 @@
+"""
+Resident matchmaking model — names and combos held in memory per
+(profile, gender mode).
+
+A pool is loaded from the database the first time it is asked for and is
+then kept in sync incrementally:
+  • update_elo / update_round / record_skip → update_combo() and update_name()
+  • generate_combos_for_new_name / import_names → names_added()
+
+Combos are virtual until first played: only combos with a NameCombo row
+(or a vote still in the journal) are held explicitly. Every other ordered
+pair of eligible names is an implicit default combo — Elo 1000, no
+matches, no streak — counted per name rather than stored.
+
+The matchmaker reads only from the pool, so picking a pair never touches
+the database once the pool is warm. Reputation and combo weights live in
+Fenwick-backed samplers, so a vote is a few O(log n) point updates, and
+sorted Elo indexes (whole pool + per name) serve opponent lookups.
+
+Pools are shared with the background pair prefetcher; every read or
+mutation goes through `pool_lock`.
+"""
+
+import math
+import random
+import threading
+
+from database.db import session_scope
+from database.models import GENDER_BITS, Gender, Name, NameCombo, reputation_score
+from logic.eloindex import EloIndex
+from logic.glicko import DEFAULT_RD, DEFAULT_VOL
+from logic.sampling import WeightedSampler
+
+DEFAULT_ELO = 1000.0
+
+# (first_id, middle_id) — identifies a combo within a profile, played or not
+ComboKey = tuple[int, int]
+
+
+def gender_enums(gender_mode: str | None) -> list[Gender]:
+    if gender_mode == "M":
+        return [Gender.M, Gender.N]
+    elif gender_mode == "F":
+        return [Gender.F, Gender.N]
+    return [Gender.M, Gender.F, Gender.N]
+
+
+def gender_masks(gender_mode: str | None) -> list[int] | None:
+    """NameCombo.gender_mask values eligible in a mode (None: any combo)."""
+    if gender_mode not in ("M", "F"):
+        return None
+    bit = GENDER_BITS[Gender[gender_mode]]
+    return [mask for mask in range(4) if mask & bit]
+
+
+def combo_weight(combo) -> float:
+    """
+    Uncertainty bonus × streak multiplier. The bonus is the combo's Glicko
+    variance relative to an unknown combo's: like 1 / (matches + 1) it
+    shrinks about linearly in games played, but it also stays high for
+    combos whose results have been surprising, and skips widen it again.
+    """
+    uncertainty = (combo.glicko_rd / DEFAULT_RD) ** 2
+    s = combo.streak
+    if s > 0:
+        streak_mult = 1.0 + 0.3 * s  # 1.3 … 2.5
+    elif s < 0:
+        streak_mult = max(0.25, 1.0 + 0.15 * s)  # 0.85 … 0.25
+    else:
+        streak_mult = 1.0
+    return uncertainty * streak_mult
+
+
+# ── Lightweight records ────────────────────────────────────────────────────────
+
+
+class NameState:
+    """In-memory mirror of a Name row (only what matchmaking needs)."""
+
+    __slots__ = ("id", "text", "gender", "rep_wins", "rep_losses")
+
+    def __init__(self, id, text, gender, rep_wins, rep_losses):
+        self.id = id
+        self.text = text
+        self.gender = gender
+        self.rep_wins = rep_wins
+        self.rep_losses = rep_losses
+
+    @property
+    def reputation(self) -> float:
+        return reputation_score(self.rep_wins, self.rep_losses)
+
+
+class ComboState:
+    """In-memory mirror of a NameCombo row — same attribute names."""
+
+    __slots__ = (
+        "first_id",
+        "middle_id",
+        "elo_score",
+        "match_count",
+        "streak",
+        "glicko_score",
+        "glicko_rd",
+        "glicko_vol",
+    )
+
+    def __init__(
+        self,
+        first_id,
+        middle_id,
+        elo_score=DEFAULT_ELO,
+        match_count=0,
+        streak=0,
+        glicko_score=DEFAULT_ELO,
+        glicko_rd=DEFAULT_RD,
+        glicko_vol=DEFAULT_VOL,
+    ):
+        self.first_id = first_id
+        self.middle_id = middle_id
+        self.elo_score = elo_score
+        self.match_count = match_count
+        self.streak = streak
+        self.glicko_score = glicko_score
+        self.glicko_rd = glicko_rd
+        self.glicko_vol = glicko_vol
+
+    def copy(self) -> "ComboState":
+        return ComboState(*(getattr(self, attr) for attr in self.__slots__))
+
+    @property
+    def key(self) -> ComboKey:
+        return (self.first_id, self.middle_id)
+
+
+# Weight of an unplayed combo: no matches, no streak, default deviation
+VIRTUAL_WEIGHT = combo_weight(ComboState(0, 0))
+
+
+# ── Pool ───────────────────────────────────────────────────────────────────────
+
+
+class ComboPool:
+    """All eligible names and played combos for one (profile, gender mode)."""
+
+    def __init__(self, profile_id: int, gender_mode: str):
+        self.profile_id = profile_id
+        self.gender_mode = gender_mode
+        self.names: dict[int, NameState] = {}
+        self.name_list: list[int] = []
+        self.combos: dict[ComboKey, ComboState] = {}
+        # name id → reputation; per name: combo key → combo_weight
+        self.name_sampler = WeightedSampler()
+        self.combo_samplers: dict[int, WeightedSampler] = {}
+        # Sorted by Elo: whole pool, and each name's own combos
+        self.elo_index = EloIndex()
+        self.name_elo: dict[int, EloIndex] = {}
+        # Sorted by Glicko rating, for the active matchmaking strategy
+        self.glicko_index = EloIndex()
+        # Running moments of (elo - 1000) for an O(1) standard deviation
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def load(self, name_ids: list[int] | None = None):
+        """Load eligible names (all, or just `name_ids`) and their played combos."""
+        for hook in _before_load:
+            hook()
+        eligible = gender_enums(self.gender_mode)
+        masks = gender_masks(self.gender_mode)
+        with session_scope() as s:
+            nq = s.query(
+                Name.id, Name.text, Name.gender, Name.rep_wins, Name.rep_losses
+            ).filter(Name.gender.in_(eligible))
+            if name_ids is not None:
+                nq = nq.filter(Name.id.in_(name_ids))
+            new_names = [NameState(*row) for row in nq.all()]
+            for n in new_names:
+                if n.id not in self.names:
+                    self.name_list.append(n.id)
+                self.names[n.id] = n
+                self.name_sampler.set(n.id, n.reputation)
+            if not new_names:
+                return
+
+            cq = s.query(
+                NameCombo.first_id,
+                NameCombo.middle_id,
+                NameCombo.elo_score,
+                NameCombo.match_count,
+                NameCombo.streak,
+                NameCombo.glicko_score,
+                NameCombo.glicko_rd,
+                NameCombo.glicko_vol,
+            ).filter(NameCombo.profile_id == self.profile_id)
+            if masks is not None:
+                cq = cq.filter(NameCombo.gender_mask.in_(masks))
+            if name_ids is not None:
+                ids = [n.id for n in new_names]
+                cq = cq.filter(
+                    NameCombo.first_id.in_(ids) | NameCombo.middle_id.in_(ids)
+                )
+            rows = cq.all()
+
+        for row in rows:
+            combo = ComboState(*row)
+            if combo.key not in self.combos:
+                self._add_combo(combo)
+
+    def _add_combo(self, combo: ComboState):
+        if combo.first_id not in self.names or combo.middle_id not in self.names:
+            return
+        key = combo.key
+        self.combos[key] = combo
+        weight = combo_weight(combo)
+        self.elo_index.add(key, combo.elo_score)
+        self.glicko_index.add(key, combo.glicko_score)
+        for nid in key:
+            sampler = self.combo_samplers.get(nid)
+            if sampler is None:
+                sampler = self.combo_samplers[nid] = WeightedSampler()
+            sampler.set(key, weight)
+            self.name_elo.setdefault(nid, EloIndex()).add(key, combo.elo_score)
+        d = combo.elo_score - DEFAULT_ELO
+        self._sum += d
+        self._sumsq += d * d
+
+    # ── Incremental sync ──────────────────────────────────────────────────────
+
+    def set_combo(self, state: ComboState):
+        """Take on a combo's new rating state (a copy is kept)."""
+        key = state.key
+        combo = self.combos.get(key)
+        if combo is None:
+            # First vote on a virtual combo — it becomes explicit
+            self._add_combo(state.copy())
+            return
+        old_elo = combo.elo_score
+        old_glicko = combo.glicko_score
+        elo_score = state.elo_score
+        old = old_elo - DEFAULT_ELO
+        new = elo_score - DEFAULT_ELO
+        self._sum += new - old
+        self._sumsq += new * new - old * old
+        for attr in ComboState.__slots__[2:]:
+            setattr(combo, attr, getattr(state, attr))
+        weight = combo_weight(combo)
+        self.elo_index.move(key, old_elo, elo_score)
+        self.glicko_index.move(key, old_glicko, state.glicko_score)
+        for nid in key:
+            self.combo_samplers[nid].set(key, weight)
+            self.name_elo[nid].move(key, old_elo, elo_score)
+
+    def set_name(self, name_id: int, rep_wins: int, rep_losses: int):
+        name = self.names.get(name_id)
+        if name is None:
+            return
+        name.rep_wins = rep_wins
+        name.rep_losses = rep_losses
+        self.name_sampler.set(name_id, name.reputation)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def combo_count(self) -> int:
+        """Every ordered pair of eligible names, played or virtual."""
+        n = len(self.names)
+        return n * (n - 1)
+
+    def played_count(self, name_id: int) -> int:
+        sampler = self.combo_samplers.get(name_id)
+        return 0 if sampler is None else len(sampler)
+
+    def virtual_count(self, name_id: int) -> int:
+        """Unplayed combos containing `name_id` (in either slot)."""
+        return 2 * (len(self.names) - 1) - self.played_count(name_id)
+
+    def combo(self, key: ComboKey) -> ComboState:
+        """Explicit state for `key`, or a default state if still virtual."""
+        return self.combos.get(key) or ComboState(*key)
+
+    def random_combo(self, rng=random) -> ComboState:
+        """Uniform over every ordered pair, played or virtual."""
+        names = self.name_list
+        first = names[int(rng.random() * len(names))]
+        middle = first
+        while middle == first:
+            middle = names[int(rng.random() * len(names))]
+        return self.combo((first, middle))
+
+    def random_virtual(self, name_id: int | None = None, rng=random):
+        """
+        A random unplayed combo (containing `name_id` if given), or None.
+        Rejection-samples first — played combos are a small minority — and
+        only falls back to enumerating partners when that keeps missing.
+        """
+        names = self.name_list
+        for _ in range(32):
+            if name_id is None:
+                key = self.random_combo(rng).key
+            else:
+                other = names[int(rng.random() * len(names))]
+                if other == name_id:
+                    continue
+                key = (name_id, other) if rng.random() < 0.5 else (other, name_id)
+            if key not in self.combos:
+                return ComboState(*key)
+
+        anchors = names if name_id is None else [name_id]
+        keys = [
+            key
+            for nid in anchors
+            for other in names
+            if other != nid
+            for key in ((nid, other), (other, nid))
+            if key not in self.combos
+        ]
+        return ComboState(*keys[int(rng.random() * len(keys))]) if keys else None
+
+    def combo_texts(self, key: ComboKey) -> tuple[str, str]:
+        """(first, middle) display text for a combo in this pool."""
+        return self.names[key[0]].text, self.names[key[1]].text
+
+    def elo_std(self) -> float:
+        """Sample standard deviation of Elo over all combos, virtual included."""
+        n = self.combo_count()
+        if n < 2:
+            return 100.0
+        var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(0.0, var))
+
+
+# ── Registry ───────────────────────────────────────────────────────────────────
+
+_pools: dict[tuple[int, str], ComboPool] = {}
+_before_load: list = []
+pool_lock = threading.RLock()
+
+
+def before_load(hook):
+    """Register a callable run before any pool reads from the database."""
+    _before_load.append(hook)
+
+
+def get_pool(profile_id: int, gender_mode: str) -> ComboPool:
+    """Return the resident pool for (profile, gender mode), loading it once."""
+    key = (profile_id, gender_mode)
+    with pool_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ComboPool(profile_id, gender_mode)
+            pool.load()
+            _pools[key] = pool
+        return pool
+
+
+def find_combo(profile_id: int, key: ComboKey) -> ComboState:
+    """Copy of a combo's resident state (default state if virtual or not loaded)."""
+    with pool_lock:
+        for (pid, _), pool in _pools.items():
+            c = pool.combos.get(key) if pid == profile_id else None
+            if c is not None:
+                return c.copy()
+    return ComboState(*key)
+
+
+def find_name(name_id: int) -> NameState | None:
+    """Copy of a resident name's state, or None if no pool holds it."""
+    with pool_lock:
+        for pool in _pools.values():
+            n = pool.names.get(name_id)
+            if n is not None:
+                return NameState(n.id, n.text, n.gender, n.rep_wins, n.rep_losses)
+    return None
+
+
+def update_combo(profile_id: int, state: ComboState):
+    """Push a combo's new rating state into every loaded pool for its profile."""
+    with pool_lock:
+        for (pid, _), pool in _pools.items():
+            if pid == profile_id:
+                pool.set_combo(state)
+
+
+def update_name(name_id: int, rep_wins: int, rep_losses: int):
+    """Push a name's new reputation into every loaded pool."""
+    with pool_lock:
+        for pool in _pools.values():
+            pool.set_name(name_id, rep_wins, rep_losses)
+
+
+def names_added(name_ids: list[int]):
+    """Pull newly inserted names (and their combos) into every loaded pool."""
+    with pool_lock:
+        for pool in _pools.values():
+            pool.load(name_ids)
+
+
+def invalidate_pools():
+    """Drop every resident pool; the next pick reloads from the database."""
+    with pool_lock:
+        _pools.clear()
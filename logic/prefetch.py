@@ -0,0 +1,222 @@
+"""
+Pair prefetcher — keeps the next few match pairs ready off the GUI thread.
+
+A single daemon worker tops a small queue up to `depth` pairs for the
+current (profile, gender mode), drawing every missing pair in one batched
+matchmaker call. With a round size above 2 it queues PreparedRounds of
+that many combos instead. Each pair carries its display text, so
+the match screen can render it without any lookups. After a vote, pairs
+that involve either voted combo are dropped, since their ratings moved.
+
+The GUI never has to pick a pair itself: take_nowait() returns at once,
+and on_ready() listeners hear (from the worker thread) when a pair lands
+or the pool turns out too small to make one. A failed pick (e.g. the
+database locked during a pool load) is passed to the listeners as well,
+then retried with a growing backoff until it succeeds or retry() is
+called.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from logic.matchmaker import pick_combo_pairs, pick_combo_round
+from logic.pool import ComboKey, get_pool, pool_lock
+
+
+@dataclass(frozen=True)
+class PreparedPair:
+    combo_a: ComboKey
+    combo_b: ComboKey
+    first_a: str
+    middle_a: str
+    first_b: str
+    middle_b: str
+
+    @property
+    def combos(self) -> tuple[ComboKey, ComboKey]:
+        return self.combo_a, self.combo_b
+
+    def touches(self, combo_keys) -> bool:
+        return self.combo_a in combo_keys or self.combo_b in combo_keys
+
+
+@dataclass(frozen=True)
+class PreparedRound:
+    combos: tuple[ComboKey, ...]
+    texts: tuple[tuple[str, str], ...]  # (first, middle) per combo
+
+    def touches(self, combo_keys) -> bool:
+        return any(k in combo_keys for k in self.combos)
+
+
+def _prepare(pool, pair) -> PreparedPair:
+    first_a, middle_a = pool.combo_texts(pair[0])
+    first_b, middle_b = pool.combo_texts(pair[1])
+    return PreparedPair(pair[0], pair[1], first_a, middle_a, first_b, middle_b)
+
+
+def prepare_pairs(
+    profile_id: int, gender_mode: str, n: int, rng=random
+) -> list[PreparedPair]:
+    """Up to `n` distinct prepared pairs from one batched pick."""
+    with pool_lock:
+        pairs = pick_combo_pairs(profile_id, gender_mode, n, rng)
+        pool = get_pool(profile_id, gender_mode)
+        return [_prepare(pool, pair) for pair in pairs]
+
+
+def prepare_rounds(
+    profile_id: int, gender_mode: str, size: int, n: int, rng=random
+) -> list[PreparedRound]:
+    """Up to `n` prepared rounds of `size` combos under one lock."""
+    rounds = []
+    with pool_lock:
+        pool = get_pool(profile_id, gender_mode)
+        for _ in range(n):
+            keys = pick_combo_round(profile_id, gender_mode, size, rng)
+            if keys is None:
+                break
+            rounds.append(PreparedRound(keys, tuple(map(pool.combo_texts, keys))))
+    return rounds
+
+
+def _prepare_batch(profile_id: int, gender_mode: str, size: int, n: int, rng):
+    if size > 2:
+        return prepare_rounds(profile_id, gender_mode, size, n, rng)
+    return prepare_pairs(profile_id, gender_mode, n, rng)
+
+
+RETRY_MIN_S = 0.5
+RETRY_MAX_S = 30.0
+
+
+class PairPrefetcher:
+    def __init__(self, depth: int = 3, rng=random):
+        self._depth = depth
+        self._rng = rng  # e.g. a seeded random.Random to replay a session
+        self._queue: deque[PreparedPair | PreparedRound] = deque()
+        self._cond = threading.Condition()
+        self._key: tuple[int, str, int] | None = None  # profile, mode, size
+        self._generation = 0
+        self._exhausted = False  # pool too small — stop retrying until reset
+        self._error: str | None = None  # last failed pick, until one succeeds
+        self._backoff = 0.0
+        self._retry_at = 0.0  # time.monotonic() before which not to retry
+        self._listeners: list = []
+        self._thread = threading.Thread(
+            target=self._run, name="pair-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def configure(self, profile_id: int, gender_mode: str, round_size: int = 2):
+        """
+        Switch profile/gender mode or round size; queued pairs (or rounds)
+        for the old setup are dropped.
+        """
+        with self._cond:
+            if self._key != (profile_id, gender_mode, round_size):
+                self._key = (profile_id, gender_mode, round_size)
+                self._reset()
+
+    def take_nowait(self) -> PreparedPair | PreparedRound | None:
+        """Next ready pair, or None if none is queued yet (see `exhausted`)."""
+        with self._cond:
+            if not self._queue:
+                return None
+            pair = self._queue.popleft()
+            self._cond.notify()
+            return pair
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the current pool has proved too small to make a pair."""
+        return self._exhausted
+
+    @property
+    def error(self) -> str | None:
+        """Why the last pick failed, while the worker is backing off."""
+        return self._error
+
+    def on_ready(self, listener):
+        """
+        Register a callable run on the worker thread after each attempt,
+        with the failure message, or None if the attempt succeeded.
+        """
+        self._listeners.append(listener)
+
+    def invalidate(self, combo_keys):
+        """Drop queued pairs involving any of `combo_keys`."""
+        keys = set(combo_keys)
+        with self._cond:
+            self._queue = deque(p for p in self._queue if not p.touches(keys))
+            self._generation += 1  # a pair being picked right now may be stale
+            self._cond.notify()
+
+    def clear(self):
+        """Drop every queued pair (e.g. after names were added)."""
+        with self._cond:
+            self._reset()
+
+    def retry(self):
+        """Retry a failed pick now instead of waiting out the backoff."""
+        with self._cond:
+            self._clear_error()
+            self._cond.notify()
+
+    def _reset(self):
+        self._queue.clear()
+        self._generation += 1
+        self._exhausted = False
+        self._clear_error()
+        self._cond.notify()
+
+    def _clear_error(self):
+        self._error = None
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (
+                    self._key is None
+                    or self._exhausted
+                    or len(self._queue) >= self._depth
+                    or self._retry_at > time.monotonic()
+                ):
+                    wait = self._retry_at - time.monotonic()
+                    self._cond.wait(wait if wait > 0 else None)
+                key, generation = self._key, self._generation
+                missing = self._depth - len(self._queue)
+
+            try:
+                pairs = _prepare_batch(*key, missing, self._rng)
+                error = None
+            except Exception as exc:  # keep the worker alive; retried below
+                pairs = []
+                error = f"{type(exc).__name__}: {exc}"
+
+            with self._cond:
+                if generation != self._generation:
+                    continue
+                if error is not None:
+                    self._error = error
+                    self._backoff = min(
+                        max(self._backoff * 2, RETRY_MIN_S), RETRY_MAX_S
+                    )
+                    self._retry_at = time.monotonic() + self._backoff
+                elif not pairs:
+                    self._clear_error()
+                    self._exhausted = True
+                else:
+                    self._clear_error()
+                    self._queue.extend(pairs[: self._depth - len(self._queue)])
+            for listener in self._listeners:
+                listener(error)
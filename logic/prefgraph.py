@@ -0,0 +1,301 @@
+"""
+Preference graph — what the match log already implies, per profile.
+
+Every vote adds an edge winner → loser between two ComboKeys. Combos that
+reach each other along those edges — A beat B, B beat C, C beat A, or
+just a pair with split results — form a strongly connected component:
+their votes contradict one another, so no order among them is implied.
+Between components the graph is a DAG, and when A's component reaches
+C's within a few edges, "A over C" is implied and a vote on it would
+mostly repeat what is known.
+
+A profile's graph is built once from the matches table with Tarjan's
+algorithm, then kept current edge by edge (Pearce–Kelly): components
+carry a topological rank, an edge that agrees with the ranks costs
+O(1), and one that does not re-ranks only the components between its
+ends — merging them, union-find style, if the edge closed a cycle.
+Edges are never removed, so components only ever merge.
+
+The matchmaker (see matchmaker._pick_from_pool) treats implied pairs as
+repeats and spends Settings.cycle_match_pct of its picks inside cyclic
+components, where a direct comparison settles the most. Graphs are
+guarded by pool_lock, like the pools.
+"""
+
+import random
+
+from sqlalchemy import select
+
+from database.db import session_scope
+from database.models import Match, NameCombo
+from logic.pool import ComboKey, ComboPool
+
+CYCLE_TRIES = 4  # cyclic components tried per pick before giving up
+
+
+class PreferenceGraph:
+    def __init__(self):
+        self._parent: dict[ComboKey, ComboKey] = {}  # union-find over combos
+        # Per component (keyed by its representative combo)
+        self._succ: dict[ComboKey, set[ComboKey]] = {}
+        self._pred: dict[ComboKey, set[ComboKey]] = {}
+        self._rank: dict[ComboKey, int] = {}  # topological: edges go up
+        self._members: dict[ComboKey, list[ComboKey]] = {}  # cyclic ones only
+        self._next_rank = 0
+
+    # ── Building ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_edges(cls, edges) -> "PreferenceGraph":
+        """Graph of (winner, loser) pairs, components by Tarjan's algorithm."""
+        graph = cls()
+        adj: dict[ComboKey, set[ComboKey]] = {}
+        for w, l in edges:  # noqa: E741
+            adj.setdefault(w, set()).add(l)
+            adj.setdefault(l, set())
+
+        # Iterative Tarjan; components come out sinks first
+        index: dict[ComboKey, int] = {}
+        low: dict[ComboKey, int] = {}
+        stack: list[ComboKey] = []
+        on_stack: set[ComboKey] = set()
+        components: list[list[ComboKey]] = []
+        for root in adj:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(adj[root]))]
+            while work:
+                v, it = work[-1]
+                for u in it:
+                    if u not in index:
+                        index[u] = low[u] = len(index)
+                        stack.append(u)
+                        on_stack.add(u)
+                        work.append((u, iter(adj[u])))
+                        break
+                    if u in on_stack:
+                        low[v] = min(low[v], index[u])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[v])
+                    if low[v] == index[v]:
+                        component = []
+                        while True:
+                            u = stack.pop()
+                            on_stack.discard(u)
+                            component.append(u)
+                            if u == v:
+                                break
+                        components.append(component)
+
+        for component in reversed(components):  # sources first
+            rep = component[0]
+            for key in component:
+                graph._parent[key] = rep
+            graph._succ[rep] = set()
+            graph._pred[rep] = set()
+            graph._rank[rep] = graph._next_rank
+            graph._next_rank += 1
+            if len(component) > 1:
+                graph._members[rep] = component
+        for w, losers in adj.items():
+            cw = graph._find(w)
+            for l in losers:  # noqa: E741
+                cl = graph._find(l)
+                if cw != cl:
+                    graph._succ[cw].add(cl)
+                    graph._pred[cl].add(cw)
+        return graph
+
+    def _find(self, key: ComboKey) -> ComboKey:
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while key != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def _node(self, key: ComboKey) -> ComboKey:
+        """Component of `key`, adding it as a new sink if unseen."""
+        if key not in self._parent:
+            self._parent[key] = key
+            self._succ[key] = set()
+            self._pred[key] = set()
+            self._rank[key] = self._next_rank
+            self._next_rank += 1
+        return self._find(key)
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def add_vote(self, winner: ComboKey, loser: ComboKey):
+        """Record that `winner` beat `loser`."""
+        cw, cl = self._node(winner), self._node(loser)
+        if cw == cl or cl in self._succ[cw]:
+            return
+        lo, hi = self._rank[cl], self._rank[cw]
+        if hi < lo:  # already in order
+            self._link(cw, cl)
+            return
+
+        # The edge runs against the ranks: look only between its ends
+        forward = self._search(cl, self._succ, lambda c: self._rank[c] <= hi)
+        backward = self._search(cw, self._pred, lambda c: self._rank[c] >= lo)
+        cycle = forward & backward
+        # Reuse the ranks in play: those reaching the winner first, then
+        # the merged cycle if any, then those the loser reaches — the last
+        # group on the highest ranks, so nothing moves past an outside edge
+        ranks = sorted(self._rank[c] for c in forward | backward)
+        before = sorted(backward - cycle, key=self._rank.__getitem__)
+        after = sorted(forward - cycle, key=self._rank.__getitem__)
+        if cycle:
+            before.append(self._merge(cycle))
+        else:
+            self._link(cw, cl)
+        for component, rank in zip(before, ranks):
+            self._rank[component] = rank
+        for component, rank in zip(after, ranks[len(ranks) - len(after) :]):
+            self._rank[component] = rank
+
+    def _link(self, cw: ComboKey, cl: ComboKey):
+        self._succ[cw].add(cl)
+        self._pred[cl].add(cw)
+
+    @staticmethod
+    def _search(start: ComboKey, edges, within) -> set[ComboKey]:
+        seen = {start}
+        stack = [start]
+        while stack:
+            for c in edges[stack.pop()]:
+                if c not in seen and within(c):
+                    seen.add(c)
+                    stack.append(c)
+        return seen
+
+    def _merge(self, cycle: set[ComboKey]) -> ComboKey:
+        """Collapse the components of a new cycle into one; returns it."""
+        rep = next(iter(cycle))
+        members = []
+        succ, pred = set(), set()
+        for c in cycle:
+            members += self._members.pop(c, None) or [c]
+            succ |= self._succ.pop(c)
+            pred |= self._pred.pop(c)
+            del self._rank[c]
+            self._parent[c] = rep
+        succ -= cycle
+        pred -= cycle
+        for c in succ:
+            self._pred[c] -= cycle
+            self._pred[c].add(rep)
+        for c in pred:
+            self._succ[c] -= cycle
+            self._succ[c].add(rep)
+        self._parent[rep] = rep
+        self._succ[rep] = succ
+        self._pred[rep] = pred
+        self._rank[rep] = 0  # set by the caller
+        self._members[rep] = members
+        return rep
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def implied(self, a: ComboKey, b: ComboKey, depth: int) -> bool:
+        """True if one combo beat the other through at most `depth` wins."""
+        if a not in self._parent or b not in self._parent:
+            return False
+        ca, cb = self._find(a), self._find(b)
+        if ca == cb:
+            return False  # contradictory results: nothing is implied
+        if self._rank[ca] > self._rank[cb]:
+            ca, cb = cb, ca
+        limit = self._rank[cb]
+        frontier = {ca}
+        seen = {ca}
+        for _ in range(depth):
+            frontier = {
+                c
+                for f in frontier
+                for c in self._succ[f]
+                if c not in seen and self._rank[c] <= limit
+            }
+            if cb in frontier:
+                return True
+            seen |= frontier
+        return False
+
+    def cyclic_pair(self, pool: ComboPool, rng=random):
+        """
+        Two combos of one contradictory component, both in `pool`; the
+        component is drawn by size. None if there is none to offer.
+        """
+        if not self._members:
+            return None
+        reps = list(self._members)
+        sizes = [len(self._members[r]) for r in reps]
+        for _ in range(CYCLE_TRIES):
+            x = rng.random() * sum(sizes)
+            for rep, size in zip(reps, sizes):
+                x -= size
+                if x < 0:
+                    break
+            members = [k for k in self._members[rep] if k in pool.combos]
+            if len(members) >= 2:
+                i = int(rng.random() * len(members))
+                j = int(rng.random() * (len(members) - 1))
+                return members[i], members[j + (j >= i)]
+        return None
+
+
+# ── Registry ───────────────────────────────────────────────────────────────────
+
+_graphs: dict[int, PreferenceGraph] = {}
+_before_load: list = []
+
+
+def before_load(hook):
+    """Register a callable run before a graph reads the match log."""
+    _before_load.append(hook)
+
+
+def preference_graph(profile_id: int) -> PreferenceGraph:
+    """The profile's graph, built from the match log on first use."""
+    graph = _graphs.get(profile_id)
+    if graph is None:
+        for hook in _before_load:
+            hook()
+        with session_scope() as s:
+            keys = {
+                cid: (f, m)
+                for cid, f, m in s.execute(
+                    select(NameCombo.id, NameCombo.first_id, NameCombo.middle_id).where(
+                        NameCombo.profile_id == profile_id
+                    )
+                )
+            }
+            log = s.execute(
+                select(Match.winner_combo_id, Match.loser_combo_id).where(
+                    Match.profile_id == profile_id, Match.was_skip.is_(False)
+                )
+            ).all()
+        graph = PreferenceGraph.from_edges(
+            (keys[w], keys[l]) for w, l in log if w in keys and l in keys
+        )
+        _graphs[profile_id] = graph
+    return graph
+
+
+def record_vote(profile_id: int, winner: ComboKey, loser: ComboKey):
+    """Add a vote to the profile's graph, if it is loaded."""
+    graph = _graphs.get(profile_id)
+    if graph is not None:
+        graph.add_vote(winner, loser)
+
+
+def clear_graphs():
+    """Drop every graph; the next use rebuilds it from the match log."""
+    _graphs.clear()
@@ -0,0 +1,110 @@
+"""
+Recent-pair memory — keeps the matchmaker from serving the same matchup,
+or the same names, again too soon.
+
+One RecentMemory per profile remembers what was shown to the user (see
+matchmaker.mark_shown; pairs picked ahead by the prefetcher don't count
+until they are on screen):
+  • pairs    the last Settings.recent_pairs pairs, as an LRU of pair
+             hashes (one int per pair; the two combos in either order
+             hash alike)
+  • names    every name in the last Settings.recent_names pairs or rounds
+  • history  with Settings.pair_history > 0, a Bloom filter of every pair
+             served since it last filled up — a long memory at about
+             1.2 bytes per pair, cleared once it holds that many
+
+penalty() scores a candidate pair against all three and the matchmaker
+redraws a few times looking for one that scores zero (see
+matchmaker._pick_from_pool). Memory only biases selection: a pool too
+small to avoid repeats still gets its least-repeated candidate.
+
+Memories live in process memory, keyed by profile id, and are guarded by
+pool_lock like the pools they serve.
+"""
+
+from collections import Counter, OrderedDict, deque
+from itertools import combinations
+
+from logic.bloom import BloomFilter
+from logic.pool import ComboKey
+
+REPEAT_PENALTY = 8  # a repeated pair is worse than any overlap of names
+
+
+def pair_hash(a: ComboKey, b: ComboKey) -> int:
+    return hash((a, b) if a <= b else (b, a))
+
+
+class RecentMemory:
+    def __init__(self):
+        self._pairs: OrderedDict[int, None] = OrderedDict()
+        self._rounds: deque[tuple[int, ...]] = deque()
+        self._names: Counter = Counter()
+        self._history: BloomFilter | None = None
+        self.pair_window = 0
+        self.name_window = 0
+        self.history_size = 0
+
+    def configure(self, pair_window: int, name_window: int, history_size: int):
+        """Apply cooldown settings; shrinking a window forgets the oldest."""
+        self.pair_window = max(0, pair_window)
+        self.name_window = max(0, name_window)
+        if history_size != self.history_size:
+            self.history_size = history_size
+            self._history = BloomFilter(history_size) if history_size > 0 else None
+        self._trim()
+
+    def _trim(self):
+        while len(self._pairs) > self.pair_window:
+            self._pairs.popitem(last=False)
+        while len(self._rounds) > self.name_window:
+            for name_id in self._rounds.popleft():
+                self._names[name_id] -= 1
+                if not self._names[name_id]:
+                    del self._names[name_id]
+
+    def penalty(self, pair: tuple[ComboKey, ComboKey]) -> int:
+        """0 for a fresh pair; more the more of it was served recently."""
+        h = pair_hash(*pair)
+        penalty = 0
+        if h in self._pairs or (self._history is not None and h in self._history):
+            penalty += REPEAT_PENALTY
+        names = {*pair[0], *pair[1]}
+        return penalty + sum(1 for name_id in names if name_id in self._names)
+
+    def remember(self, combos: tuple[ComboKey, ...]):
+        """
+        Record combos shown together — a pair, or a round — as served:
+        every pair among them, and their names as one round.
+        """
+        for pair in combinations(combos, 2):
+            h = pair_hash(*pair)
+            if self.pair_window:
+                self._pairs[h] = None
+                self._pairs.move_to_end(h)
+            if self._history is not None and h not in self._history:
+                if self._history.full:
+                    self._history.clear()
+                self._history.add(h)
+        if self.name_window:
+            names = tuple({name_id for combo in combos for name_id in combo})
+            self._rounds.append(names)
+            self._names.update(names)
+        self._trim()
+
+
+_memories: dict[int, RecentMemory] = {}
+
+
+def recent_memory(profile_id: int, cfg) -> RecentMemory:
+    """The profile's memory, configured from Settings `cfg`."""
+    memory = _memories.get(profile_id)
+    if memory is None:
+        memory = _memories[profile_id] = RecentMemory()
+    memory.configure(cfg.recent_pairs, cfg.recent_names, cfg.pair_history)
+    return memory
+
+
+def clear_recent():
+    """Forget every profile's recent pairs and names."""
+    _memories.clear()
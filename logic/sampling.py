@@ -0,0 +1,125 @@
+"""
+Weighted sampling in O(log n) — a Fenwick (binary indexed) tree keyed by id.
+
+Used by the resident pools so that reputation- and combo-weighted picks
+cost a tree descent instead of a linear scan + cumulative sum, and a vote
+only needs a point update for the handful of weights it changes.
+"""
+
+import random
+
+
+class WeightedSampler:
+    """Dynamic set of (key → weight) supporting point updates and sampling."""
+
+    def __init__(self):
+        self._keys: list = []
+        self._index: dict = {}
+        self._weights: list[float] = []
+        self._tree: list[float] = [0.0]  # 1-based, len == capacity + 1
+        self._capacity = 0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def weight(self, key) -> float:
+        i = self._index.get(key)
+        return 0.0 if i is None else self._weights[i]
+
+    def total(self) -> float:
+        return self._prefix(self._capacity)
+
+    # ── Mutation ──────────────────────────────────────────────────────────────
+
+    def set(self, key, weight: float):
+        """Insert `key` or change its weight."""
+        weight = max(0.0, float(weight))
+        i = self._index.get(key)
+        if i is None:
+            i = len(self._keys)
+            self._index[key] = i
+            self._keys.append(key)
+            self._weights.append(weight)
+            if i >= self._capacity:
+                self._rebuild(max(16, self._capacity * 2))
+                return
+            self._add(i, weight)
+            return
+        delta = weight - self._weights[i]
+        if delta:
+            self._weights[i] = weight
+            self._add(i, delta)
+
+    def _add(self, i: int, delta: float):
+        j = i + 1
+        while j <= self._capacity:
+            self._tree[j] += delta
+            j += j & -j
+        # Bound floating-point drift from repeated deltas
+        self._updates += 1
+        if self._updates > self._capacity:
+            self._rebuild(self._capacity)
+
+    def _rebuild(self, capacity: int):
+        self._capacity = capacity
+        tree = [0.0] * (capacity + 1)
+        for i, w in enumerate(self._weights):
+            tree[i + 1] = w
+        for j in range(1, capacity + 1):
+            parent = j + (j & -j)
+            if parent <= capacity:
+                tree[parent] += tree[j]
+        self._tree = tree
+        self._updates = 0
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def _prefix(self, n: int) -> float:
+        total = 0.0
+        while n > 0:
+            total += self._tree[n]
+            n -= n & -n
+        return total
+
+    def _find(self, u: float) -> int:
+        """Smallest slot whose prefix sum exceeds u."""
+        pos = 0
+        step = 1 << (self._capacity.bit_length() - 1) if self._capacity else 0
+        while step:
+            nxt = pos + step
+            if nxt <= self._capacity and self._tree[nxt] <= u:
+                pos = nxt
+                u -= self._tree[nxt]
+            step >>= 1
+        return pos  # 0-based slot
+
+    def sample(self, rng=random):
+        """Draw one key proportionally to its weight; None if all weights are 0."""
+        total = self.total()
+        if total <= 0.0:
+            return None
+        i = self._find(rng.random() * total)
+        n = len(self._keys)
+        if i >= n or self._weights[i] <= 0.0:
+            # Rounding landed past the last positive slot — step back to it
+            i = min(i, n - 1)
+            while i >= 0 and self._weights[i] <= 0.0:
+                i -= 1
+            if i < 0:
+                return None
+        return self._keys[i]
+
+    def sample_excluding(self, keys, rng=random):
+        """Sample as if `keys` had zero weight (restored afterwards)."""
+        saved = [(k, self._weights[self._index[k]]) for k in keys if k in self._index]
+        for k, _ in saved:
+            self.set(k, 0.0)
+        try:
+            return self.sample(rng)
+        finally:
+            for k, w in saved:
+                self.set(k, w)
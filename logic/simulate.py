@@ -0,0 +1,361 @@
+"""
+Offline matchmaking simulator and benchmark.
+
+Builds a synthetic pool in a throwaway database, plants hidden "true"
+preferences, and lets a simulated voter answer the real matchmaker
+(pick_combo_pair) through the real vote path (update_elo), exactly as the
+match screen would. Reports how quickly and how well the ratings recover
+the truth:
+
+  votes to top K   first checkpoint at which the rated top K is exactly
+                   the true top K (None if never within the budget)
+  Kendall τ        rank agreement with the truth over a fixed sample of
+                   combos (virtual ones tie at the default rating)
+  pick / vote ms   median and p95 latency of pick_combo_pair and
+                   update_elo (full batches flush on the vote-flush worker)
+  repeats          votes spent on a pair already voted on in the run
+  name reuse       rounds sharing a name with the round before
+
+The truth is additive: every name has a first-slot and a middle-slot
+appeal, and each combo a little (bounded) interaction noise on top. The
+voter prefers the truly better combo with the Elo logistic of the gap,
+scaled by `noise` (1 = as consistent as Elo assumes, higher = erratic).
+
+With round_size above 2, every vote is a round (pick_combo_round,
+update_round) and the voter picks its winner by the Plackett–Luce first
+choice on the same strengths; repeats then count the winner-over-loser
+pairs each round implies.
+
+    python -m logic.simulate                      # 50 / 500 / 2000 names
+    python -m logic.simulate --names 200 --votes 3000 \\
+        --strategy classic active --set k_factor_default=48
+    python -m logic.simulate --set recent_pairs=0 --set recent_names=0
+    python -m logic.simulate --names 500 --set round_size=4
+
+simulate() points database.db at a temporary file and leaves it
+uninitialized afterwards, so run it in a process of its own (as the
+command line does), never inside the app.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+
+from database import db
+from database.models import Gender
+from database.settings import Settings
+from logic import elo, pool
+from logic.prefgraph import clear_graphs
+from logic.recent import clear_recent, pair_hash
+from logic.combogen import import_names
+from logic.matchmaker import mark_shown, pick_combo_pair, pick_combo_round
+
+PROFILE_ID = 1
+GENDER_MODE = "M"  # every simulated name is neutral, so any mode sees them all
+APPEAL_SD = 150.0  # spread of per-name slot appeal, rating points
+INTERACTION_SD = 40.0  # per-combo deviation from the additive model
+INTERACTION_CAP = 3.0 * INTERACTION_SD  # truncated, so the true top K is exact
+TAU_SAMPLE = 400  # combos in the Kendall τ sample
+
+
+@dataclass(frozen=True)
+class SimResult:
+    names: int
+    votes: int
+    strategy: str
+    source: str
+    votes_to_top_k: int | None
+    top_k_overlap: int  # of the final rated top K
+    kendall_tau: float
+    pick_ms: float
+    pick_p95_ms: float
+    vote_ms: float
+    vote_p95_ms: float
+    repeat_pairs: int
+    name_reuse: int
+
+
+class _Truth:
+    """Hidden preferences: additive slot appeal plus combo interaction."""
+
+    def __init__(self, name_ids: list[int], rng: random.Random):
+        self._first = {nid: rng.gauss(0.0, APPEAL_SD) for nid in name_ids}
+        self._middle = {nid: rng.gauss(0.0, APPEAL_SD) for nid in name_ids}
+        self._seed = rng.getrandbits(32)
+        self._name_ids = name_ids
+
+    def score(self, key: pool.ComboKey) -> float:
+        # Interaction noise is a pure function of the key, so it never
+        # has to be stored for the millions of combos a large pool has
+        noise = random.Random(hash((self._seed, key))).gauss(0.0, INTERACTION_SD)
+        noise = max(-INTERACTION_CAP, min(INTERACTION_CAP, noise))
+        return self._first[key[0]] + self._middle[key[1]] + noise
+
+    def top(self, k: int) -> set[pool.ComboKey]:
+        """
+        Exact top K without scoring every pair: only names near the top of
+        each slot can reach it, and the window widens until no name
+        outside it could, even with the largest interaction bonus.
+        """
+        firsts = sorted(self._first, key=self._first.get, reverse=True)
+        middles = sorted(self._middle, key=self._middle.get, reverse=True)
+        best_first = self._first[firsts[0]]
+        best_middle = self._middle[middles[0]]
+        width = min(len(firsts), 2 * k + 8)
+        while True:
+            keys = [(f, m) for f in firsts[:width] for m in middles[:width] if f != m]
+            top = sorted(keys, key=self.score, reverse=True)[:k]
+            if width == len(firsts):
+                return set(top)
+            cut = self.score(top[-1]) - 2.0 * INTERACTION_CAP
+            if (
+                self._first[firsts[width]] + best_middle < cut
+                and best_first + self._middle[middles[width]] < cut
+            ):
+                return set(top)
+            width = min(len(firsts), 2 * width)
+
+
+def _round_winner(
+    truth: _Truth, keys: tuple[pool.ComboKey, ...], noise: float, rng
+) -> pool.ComboKey:
+    """Plackett–Luce first choice: P(k) ∝ 10^(score / (400·noise))."""
+    scores = [truth.score(k) / noise for k in keys]
+    top = max(scores)
+    weights = [10 ** ((x - top) / 400.0) for x in scores]
+    x = rng.random() * sum(weights)
+    for key, w in zip(keys, weights):
+        x -= w
+        if x < 0:
+            return key
+    return keys[-1]
+
+
+def _rated_top(k: int, source: str) -> set[pool.ComboKey]:
+    with pool.pool_lock:
+        p = pool.get_pool(PROFILE_ID, GENDER_MODE)
+        index = p.glicko_index if source == "glicko" else p.elo_index
+        return set(index.top(k))
+
+
+def _rating(key: pool.ComboKey, source: str) -> float:
+    with pool.pool_lock:
+        combo = pool.get_pool(PROFILE_ID, GENDER_MODE).combo(key)
+    return combo.glicko_score if source == "glicko" else combo.elo_score
+
+
+def kendall_tau(xs: list[float], ys: list[float]) -> float:
+    """Kendall's τ-b of two paired score lists (ties allowed)."""
+    concordant = discordant = ties_x = ties_y = 0
+    for (x1, y1), (x2, y2) in combinations(zip(xs, ys), 2):
+        dx, dy = x1 - x2, y1 - y2
+        if dx == 0 and dy == 0:
+            continue
+        if dx == 0:
+            ties_x += 1
+        elif dy == 0:
+            ties_y += 1
+        elif (dx > 0) == (dy > 0):
+            concordant += 1
+        else:
+            discordant += 1
+    n0 = concordant + discordant
+    denom = ((n0 + ties_x) * (n0 + ties_y)) ** 0.5
+    return (concordant - discordant) / denom if denom else 0.0
+
+
+def _p95(samples: list[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def simulate(
+    names: int,
+    votes: int,
+    top_k: int = 10,
+    seed: int = 0,
+    noise: float = 1.0,
+    source: str = "elo",
+    check_every: int = 25,
+    **overrides,
+) -> SimResult:
+    """
+    Run one simulation in a temporary database. `overrides` are Settings
+    values (e.g. match_strategy="active", k_factor_default=48); `source`
+    is the rating the result is judged on ("elo" or "glicko").
+    """
+    rng = random.Random(seed)  # truth and voter
+    picker = random.Random(f"matchmaker-{seed}")  # pair selection
+
+    with tempfile.TemporaryDirectory(prefix="nominis-sim-") as tmp:
+        saved_path = db.DB_PATH
+        db.DB_PATH = Path(tmp) / "nominis.db"
+        try:
+            db.init_db()
+            elo.recover_votes()  # journal next to the temporary database
+            pool.invalidate_pools()
+            clear_recent()
+            clear_graphs()
+            if overrides:
+                db.update_settings(**overrides)
+
+            import_names([(f"Sim{i}", Gender.N) for i in range(names)])
+            with pool.pool_lock:
+                name_ids = list(pool.get_pool(PROFILE_ID, GENDER_MODE).name_list)
+            truth = _Truth(name_ids, rng)
+            best = truth.top(top_k)
+
+            pick_ms, vote_ms = [], []
+            votes_to_top_k = None
+            served: set[int] = set()
+            repeat_pairs = name_reuse = 0
+            last_names: set[int] = set()
+            round_size = db.settings().round_size
+            for v in range(1, votes + 1):
+                t0 = time.perf_counter()
+                if round_size > 2:
+                    keys = pick_combo_round(PROFILE_ID, GENDER_MODE, round_size, picker)
+                    mark_shown(PROFILE_ID, keys)
+                    t1 = time.perf_counter()
+                    winner = _round_winner(truth, keys, noise, rng)
+                    losers = [k for k in keys if k != winner]
+                    elo.update_round(PROFILE_ID, [winner, *losers])
+                else:
+                    keys = pick_combo_pair(PROFILE_ID, GENDER_MODE, picker)
+                    mark_shown(PROFILE_ID, keys)
+                    t1 = time.perf_counter()
+                    a, b = keys
+                    gap = (truth.score(b) - truth.score(a)) / noise
+                    if rng.random() < 1.0 / (1.0 + 10 ** (gap / 400.0)):
+                        winner, losers = a, [b]
+                    else:
+                        winner, losers = b, [a]
+                    elo.update_elo(PROFILE_ID, winner, losers[0])
+                t2 = time.perf_counter()
+                for loser in losers:
+                    h = pair_hash(winner, loser)
+                    repeat_pairs += h in served
+                    served.add(h)
+                names_now = {n for k in keys for n in k}
+                name_reuse += bool(names_now & last_names)
+                last_names = names_now
+                pick_ms.append((t1 - t0) * 1000.0)
+                vote_ms.append((t2 - t1) * 1000.0)
+                if (
+                    votes_to_top_k is None
+                    and v % check_every == 0
+                    and _rated_top(top_k, source) == best
+                ):
+                    votes_to_top_k = v
+            elo.flush_votes()
+            strategy = db.settings().match_strategy
+
+            overlap = len(_rated_top(top_k, source) & best)
+            sample = [
+                (f, m)
+                for f, m in (
+                    (rng.choice(name_ids), rng.choice(name_ids))
+                    for _ in range(TAU_SAMPLE)
+                )
+                if f != m
+            ]
+            sample += best  # make sure the region that matters is covered
+            tau = kendall_tau(
+                [truth.score(k) for k in sample], [_rating(k, source) for k in sample]
+            )
+        finally:
+            pool.invalidate_pools()
+            clear_recent()
+            clear_graphs()
+            if db.engine is not None:
+                db.engine.dispose()
+            db.DB_PATH = saved_path
+
+    return SimResult(
+        names=names,
+        votes=votes,
+        strategy=strategy,
+        source=source,
+        votes_to_top_k=votes_to_top_k,
+        top_k_overlap=overlap,
+        kendall_tau=tau,
+        pick_ms=statistics.median(pick_ms),
+        pick_p95_ms=_p95(pick_ms),
+        vote_ms=statistics.median(vote_ms),
+        vote_p95_ms=_p95(vote_ms),
+        repeat_pairs=repeat_pairs,
+        name_reuse=name_reuse,
+    )
+
+
+# ── Command line ───────────────────────────────────────────────────────────────
+
+
+def _setting(text: str) -> tuple[str, str]:
+    key, sep, value = text.partition("=")
+    if not sep or key not in Settings.keys():
+        raise argparse.ArgumentTypeError(f"expected <setting>=<value>, got {text!r}")
+    return key, value
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m logic.simulate", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--names", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--votes", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seeds", type=int, default=1, help="repeats per setup")
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--source", choices=("elo", "glicko"), default="elo")
+    parser.add_argument(
+        "--strategy", nargs="+", default=["classic"], choices=("classic", "active")
+    )
+    parser.add_argument(
+        "--set",
+        type=_setting,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="override a setting, e.g. --set match_random_pct=10",
+    )
+    args = parser.parse_args(argv)
+    typed = Settings().with_values(dict(args.set))
+    overrides = {key: getattr(typed, key) for key, _ in args.set}
+
+    print(
+        f"{'names':>6} {'strategy':>8} {'seed':>4}  {'to top K':>8} "
+        f"{'overlap':>7} {'tau':>6}  {'pick ms':>13}  {'vote ms':>13}  "
+        f"{'repeats':>7} {'reuse':>6}"
+    )
+    for names in args.names:
+        for strategy in args.strategy:
+            for seed in range(args.seeds):
+                values = {"active_top_k": args.top_k, **overrides}
+                values["match_strategy"] = strategy
+                r = simulate(
+                    names,
+                    args.votes,
+                    top_k=args.top_k,
+                    seed=seed,
+                    noise=args.noise,
+                    source=args.source,
+                    **values,
+                )
+                to_top = "-" if r.votes_to_top_k is None else str(r.votes_to_top_k)
+                print(
+                    f"{r.names:>6} {r.strategy:>8} {seed:>4}  {to_top:>8} "
+                    f"{r.top_k_overlap:>4}/{args.top_k:<2} {r.kendall_tau:>6.3f}  "
+                    f"{r.pick_ms:>5.2f} p95 {r.pick_p95_ms:>5.2f}  "
+                    f"{r.vote_ms:>5.2f} p95 {r.vote_p95_ms:>5.2f}  "
+                    f"{r.repeat_pairs:>7} {r.name_reuse:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
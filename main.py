@@ -3,6 +3,7 @@
 import sys
 from PySide6.QtWidgets import QApplication
 from database.db import init_db
+from logic.elo import flush_votes, recover_votes
 from ui.main_window import MainWindow
 from styles.theme import STYLESHEET
 
@@ -15,6 +16,8 @@ def main():
     app.setDesktopFileName("nominis")
 
     init_db()
+    recover_votes()
+    app.aboutToQuit.connect(flush_votes)
 
     window = MainWindow()
     window.show()
@@ -123,6 +123,21 @@ QPushButton#name_card_b:hover {{
     background-color: rgba(255, 182, 193, 0.10);
     border-color: #ffd0d8;
 }}
+QPushButton#name_card_round {{
+    background-color: {BG1};
+    border: 2px solid {LAVEN};
+    border-radius: 16px;
+    color: {TEXT};
+    font-size: 20px;
+    font-weight: bold;
+    padding: 28px 16px;
+    min-width: 120px;
+    min-height: 120px;
+}}
+QPushButton#name_card_round:hover {{
+    background-color: rgba(195, 177, 225, 0.10);
+    border-color: #d8cbef;
+}}
 
 /* ── Inputs ──────────────────────────────────────────── */
 QLineEdit, QTextEdit, QPlainTextEdit {{
@@ -0,0 +1,127 @@
+"""
+logic/leaderboard.top_combos against a brute-force ranking, one statement
+per call, on a small seeded database.
+"""
+
+import random
+
+import pytest
+from sqlalchemy import event
+
+from database import db
+from database.models import GENDER_BITS, Gender, Name, NameCombo, combined_scores
+from logic.combined import rebuild_combined
+from logic.leaderboard import top_combos
+from logic.pool import DEFAULT_ELO
+
+PROFILES = [1, 2]
+GENDERS = [Gender.M, Gender.F, Gender.N, Gender.M, Gender.N, Gender.F, Gender.M]
+MODE_BITS = {"M": 1, "F": 2}
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    """Names, and about a third of the pairs played per profile (some tied)."""
+    saved_path = db.DB_PATH
+    db.DB_PATH = tmp_path_factory.mktemp("leaderboard") / "nominis.db"
+    db.init_db()
+    rng = random.Random(7)
+    with db.session_scope() as s:
+        names = [Name(text=f"Name{i}", gender=g) for i, g in enumerate(GENDERS)]
+        s.add_all(names)
+        s.flush()
+        genders = {n.id: n.gender for n in names}
+        played = {}  # (pid, first_id, middle_id) → elo
+        for pid in PROFILES:
+            for f in genders:
+                for m in genders:
+                    if f == m or rng.random() > 0.35:
+                        continue
+                    # A coarse grid, so ties exercise the tie-breaks
+                    elo = DEFAULT_ELO + 50 * rng.randint(-4, 4)
+                    played[pid, f, m] = elo
+                    s.add(
+                        NameCombo(
+                            profile_id=pid,
+                            first_id=f,
+                            middle_id=m,
+                            elo_score=elo,
+                            gender_mask=GENDER_BITS[genders[f]]
+                            & GENDER_BITS[genders[m]],
+                        )
+                    )
+        s.flush()
+        rebuild_combined(s)
+        texts = {n.id: n.text for n in names}
+    yield texts, genders, played
+    db.engine.dispose()
+    db.DB_PATH = saved_path
+
+
+@pytest.fixture
+def statements():
+    """Statements run through the engine while the test body executes."""
+    seen = []
+
+    def count(_conn, _cursor, statement, *_args):
+        seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(db.engine, "before_cursor_execute", count)
+
+
+def _brute_force(seeded, profile_ids, gender_mode):
+    """
+    (first, middle, score, played) for every eligible ordered pair, ranked
+    the way top_combos promises.
+    """
+    texts, genders, played = seeded
+    rows = []
+    for f in genders:
+        for m in genders:
+            if f == m:
+                continue
+            mask = GENDER_BITS[genders[f]] & GENDER_BITS[genders[m]]
+            if gender_mode is not None and not mask & MODE_BITS[gender_mode]:
+                continue
+            elos = [played.get((pid, f, m)) for pid in profile_ids]
+            is_played = any(e is not None for e in elos)
+            if len(profile_ids) == 1:
+                score = elos[0] if is_played else DEFAULT_ELO
+            else:
+                score = combined_scores(
+                    [(DEFAULT_ELO if e is None else e, 0) for e in elos]
+                )["mean"]
+            rows.append((-score, not is_played, f, m, texts[f], texts[m], score))
+    rows.sort()
+    return [(r[4], r[5], r[6], not r[1]) for r in rows]
+
+
+@pytest.mark.parametrize("gender_mode", [None, "M", "F"])
+@pytest.mark.parametrize("profile_ids", [[1], [2], PROFILES])
+def test_top_combos_matches_brute_force(seeded, statements, profile_ids, gender_mode):
+    expected = _brute_force(seeded, profile_ids, gender_mode)
+    assert {played for *_, played in expected} == {True, False}  # both arms
+
+    rows = top_combos(profile_ids, gender_mode, len(expected) + 5)
+    assert len(statements) == 1
+    assert [row[:3] for row in rows] == [row[:3] for row in expected]
+
+
+@pytest.mark.filterwarnings("error")  # e.g. a cartesian product past DEFAULT_ELO
+@pytest.mark.parametrize("profile_ids", [[1], PROFILES])
+def test_pages_cover_the_ranking_once(seeded, statements, profile_ids):
+    expected = [row[:3] for row in _brute_force(seeded, profile_ids, None)]
+    pages = []
+    calls = 0
+    last = None
+    while True:
+        page = top_combos(profile_ids, None, 4, after=last)
+        calls += 1
+        pages += [row[:3] for row in page]
+        if len(page) < 4:
+            break
+        last = page[-1]
+    assert len(statements) == calls
+    assert pages == expected
@@ -13,9 +13,9 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from database.db import get_session
+from database.db import session_scope
 from database.models import Gender, Name
-from logic.combogen import generate_combos_for_new_name
+from logic.combogen import generate_combos_for_new_name, import_names
 from styles.theme import COLORS
 
 GENDER_OPTIONS = [
@@ -157,7 +157,7 @@ class AddNamesScreen(QWidget):
         lines = [line.strip() for line in raw.splitlines() if line.strip()]
         default = self._selected_gender(self._batch_gender)
 
-        added = skipped = 0
+        entries = []
         for line in lines:
             parts = [p.strip() for p in line.rsplit(",", 1)]
             name_text = parts[0].title()
@@ -167,11 +167,9 @@ class AddNamesScreen(QWidget):
                 gender = Gender(parts[1].upper())
             else:
                 gender = default
-            ok, _ = self._insert_name(name_text, gender)
-            if ok:
-                added += 1
-            else:
-                skipped += 1
+            entries.append((name_text, gender))
+
+        added, skipped = import_names(entries)
 
         msg = f"✓ {added} added"
         if skipped:
@@ -182,7 +180,7 @@ class AddNamesScreen(QWidget):
             self._batch_input.clear()
 
     def _insert_name(self, text: str, gender: Gender) -> tuple[bool, str]:
-        with get_session() as s:
+        with session_scope() as s:
             existing = s.query(Name).filter(Name.text == text).first()
             if existing:
                 return False, f"\u201c{text}\u201d already exists."
@@ -190,13 +188,12 @@ class AddNamesScreen(QWidget):
             s.add(name)
             s.flush()
             new_id = name.id
-            s.commit()
 
         # Generate combos outside the session to avoid conflicts
         combo_count = generate_combos_for_new_name(new_id)
         return (
             True,
-            f"\u2713 \u201c{text}\u201d added — {combo_count} combos generated.",
+            f"\u2713 \u201c{text}\u201d added — {combo_count} new combos to rank.",
         )
 
     def refresh(self):
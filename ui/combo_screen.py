@@ -12,15 +12,22 @@ from PySide6.QtWidgets import (
     QSpinBox,
     QScrollArea,
 )
-from sqlalchemy import func
-from database.db import get_session, get_setting
-from database.models import NameCombo, Name, Gender
+from database import epoch
+from database.db import settings
+from logic.leaderboard import top_combos
 from styles.theme import COLORS
+from ui.loader import DataLoader
+from ui.ranking_model import SCORE_HEADERS, format_score
 
 
 class ComboScreen(QWidget):
     def __init__(self):
         super().__init__()
+        self._rendered = None  # (data epoch, source, gender, count) last shown
+        self._requested = None  # stamp of the load in flight, if any
+        self._loader = DataLoader(self)
+        self._loader.loaded.connect(self._show_results)
+        self._loader.failed.connect(self._show_failure)
         self._build_ui()
 
     def _build_ui(self):
@@ -101,16 +108,24 @@ class ComboScreen(QWidget):
         root.addWidget(self._scroll, stretch=1)
 
     def refresh(self):
-        self._generate()
+        if self._stamp() not in (self._rendered, self._requested):
+            self._generate()
+
+    def _stamp(self) -> tuple:
+        src_id = self._src_group.checkedId()
+        profile_ids = [1, 2] if src_id == 2 else [src_id + 1]
+        scopes = [epoch.NAMES, epoch.SETTINGS]
+        scopes += [epoch.profile_scope(p) for p in profile_ids]
+        return (
+            epoch.epoch(*scopes),
+            src_id,
+            self._gen_group.checkedId(),
+            self._count_spin.value(),
+        )
 
     def _generate(self):
-        # Clear old results
-        while self._results_layout.count() > 1:
-            item = self._results_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        surname = get_setting("surname") or "Smith"
+        # Only marked rendered once the load succeeds, so a failure retries
+        self._requested = self._stamp()
         src_id = self._src_group.checkedId()  # 0=Husband, 1=Wife, 2=Combined
         gen_id = self._gen_group.checkedId()  # 0=Any, 1=M, 2=F
         count = self._count_spin.value()
@@ -118,76 +133,65 @@ class ComboScreen(QWidget):
         gender_mode_map = {0: None, 1: "M", 2: "F"}
         gender_mode = gender_mode_map[gen_id]
 
-        combos = self._get_top_combos(src_id, gender_mode, count)
+        self._show_message("Loading…")
+        # Off the GUI thread; a newer request supersedes this one
+        self._loader.request(
+            self._get_top_combos,
+            src_id,
+            gender_mode,
+            count,
+            settings().combined_score,
+            settings().score_source,
+        )
 
+    def _clear_results(self):
+        while self._results_layout.count() > 1:
+            item = self._results_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+
+    def _show_message(self, text: str):
+        self._clear_results()
+        lbl = QLabel(text)
+        lbl.setObjectName("muted")
+        self._results_layout.insertWidget(0, lbl)
+
+    def _show_failure(self, message: str):
+        self._requested = None
+        self._show_message(f"Couldn't load combos — {message}")
+
+    def _show_results(self, result: tuple[int, str, list[tuple]]):
+        self._rendered, self._requested = self._requested, None
+        src_id, source, combos = result
         if not combos:
-            lbl = QLabel("No combos yet — add names and start voting!")
-            lbl.setObjectName("muted")
-            self._results_layout.insertWidget(0, lbl)
+            self._show_message("No combos yet — add names and start voting!")
             return
 
+        self._clear_results()
+        surname = settings().surname
         colors = [COLORS["blue"], COLORS["pink"], COLORS["laven"]]
         color = colors[src_id]
 
-        for i, (first, middle, elo) in enumerate(combos):
+        for i, (first, middle, elo, margin, *_) in enumerate(combos):
             full = f"{first}  {middle}  {surname}"
-            card = self._make_card(i + 1, full, f"{elo:.0f}", color)
+            score = f"{SCORE_HEADERS[source]} {format_score(elo, margin)}"
+            card = self._make_card(i + 1, full, score, color)
             self._results_layout.insertWidget(i, card)
 
-    def _eligible_ids(self, s, mode: str | None) -> set[int] | None:
-        if mode == "M":
-            genders = [Gender.M, Gender.N]
-        elif mode == "F":
-            genders = [Gender.F, Gender.N]
-        else:
-            return None  # no filter
-        return {n.id for n in s.query(Name).filter(Name.gender.in_(genders)).all()}
-
+    @staticmethod
     def _get_top_combos(
-        self, src_id: int, gender_mode: str | None, limit: int
-    ) -> list[tuple[str, str, float]]:
-        with get_session() as s:
-            eligible = self._eligible_ids(s, gender_mode)
-
-            if src_id == 2:  # Combined
-                q = s.query(
-                    NameCombo.first_id,
-                    NameCombo.middle_id,
-                    func.avg(NameCombo.elo_score).label("avg_elo"),
-                ).filter(NameCombo.profile_id.in_([1, 2]))
-                if eligible is not None:
-                    q = q.filter(
-                        NameCombo.first_id.in_(eligible),
-                        NameCombo.middle_id.in_(eligible),
-                    )
-                rows = (
-                    q.group_by(NameCombo.first_id, NameCombo.middle_id)
-                    .order_by(func.avg(NameCombo.elo_score).desc())
-                    .limit(limit)
-                    .all()
-                )
-            else:
-                pid = src_id + 1  # 0→1 (Husband), 1→2 (Wife)
-                q = s.query(
-                    NameCombo.first_id,
-                    NameCombo.middle_id,
-                    NameCombo.elo_score,
-                ).filter(NameCombo.profile_id == pid)
-                if eligible is not None:
-                    q = q.filter(
-                        NameCombo.first_id.in_(eligible),
-                        NameCombo.middle_id.in_(eligible),
-                    )
-                rows = q.order_by(NameCombo.elo_score.desc()).limit(limit).all()
-
-            result = []
-            for first_id, middle_id, elo in rows:
-                fn = s.get(Name, first_id)
-                mn = s.get(Name, middle_id)
-                result.append((fn.text, mn.text, float(elo)))
-        return result
-
-    def _make_card(self, rank: int, combo: str, elo: str, color: str) -> QFrame:
+        src_id: int,
+        gender_mode: str | None,
+        limit: int,
+        aggregate: str,
+        source: str,
+    ) -> tuple[int, str, list[tuple]]:
+        """Runs on a worker thread."""
+        profile_ids = [1, 2] if src_id == 2 else [src_id + 1]  # 2 = Combined
+        rows = top_combos(profile_ids, gender_mode, limit, aggregate, source=source)
+        return src_id, source, rows
+
+    def _make_card(self, rank: int, combo: str, score: str, color: str) -> QFrame:
         card = QFrame()
         card.setObjectName("card")
         layout = QHBoxLayout(card)
@@ -205,7 +209,7 @@ class ComboScreen(QWidget):
         )
         layout.addWidget(name_lbl, stretch=1)
 
-        elo_lbl = QLabel(f"Elo {elo}")
+        elo_lbl = QLabel(score)
         elo_lbl.setStyleSheet(f"color: {COLORS['muted']}; font-size: 12px;")
         layout.addWidget(elo_lbl)
 
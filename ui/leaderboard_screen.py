@@ -1,7 +1,6 @@
 """Leaderboard screen — top combos per profile + combined."""
 
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QButtonGroup,
@@ -9,29 +8,28 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QLabel,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
-from sqlalchemy import func
-
-from database.db import get_session, get_setting
-from database.models import Gender, Name, NameCombo
+from database import epoch
+from database.db import settings
 from styles.theme import COLORS
+from ui.ranking_model import RankingModel
 
 GENDER_LABELS = {
     "All": None,
     "♂ Masc": "M",
     "♀ Fem": "F",
 }
-TOP_N = 15
 
 
 class LeaderboardScreen(QWidget):
     def __init__(self):
         super().__init__()
         self._gender_filter: str | None = None  # "M", "F", or None
+        # table → (data epoch, gender filter) it was last rendered at
+        self._rendered: dict[QTableView, tuple[int, str | None]] = {}
         self._build_ui()
 
     # ── UI ────────────────────────────────────────────────────────────────────
@@ -85,136 +83,78 @@ class LeaderboardScreen(QWidget):
 
         root.addLayout(cols, stretch=1)
 
-    def _make_table_section(self, heading: str, color: str) -> QTableWidget:
-        """Create a labeled table section. Returns the QTableWidget; stores container."""
+    def _make_table_section(self, heading: str, color: str) -> QTableView:
+        """Create a labeled table section. Returns the QTableView; stores container."""
         container = QWidget()
         vbox = QVBoxLayout(container)
         vbox.setContentsMargins(0, 0, 0, 0)
         vbox.setSpacing(8)
 
+        head = QHBoxLayout()
         lbl = QLabel(heading)
         lbl.setStyleSheet(f"color: {color}; font-weight: bold; font-size: 15px;")
-        vbox.addWidget(lbl)
-
-        tbl = QTableWidget(0, 4)
-        tbl.setHorizontalHeaderLabels(["#", "First", "Middle", "Elo"])
-        tbl.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        tbl.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        tbl.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        tbl.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        head.addWidget(lbl)
+        head.addStretch()
+        # Placeholder while a page loads in the background
+        status = QLabel("Loading…")
+        status.setObjectName("muted")
+        status.setVisible(False)
+        head.addWidget(status)
+        vbox.addLayout(head)
+
+        tbl = QTableView()
+        model = RankingModel(color, tbl)
+        model.loading.connect(lambda busy: self._show_status(status, busy))
+        model.failed.connect(status.setText)
+        model.failed.connect(status.show)
+        # Not rendered after all, so the next refresh retries the query
+        model.failed.connect(lambda _message: self._rendered.pop(tbl, None))
+        tbl.setModel(model)
+        # Fixed sizes: nothing has to measure every loaded row
+        header = tbl.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Stretch)
+        header.setSectionResizeMode(0, QHeaderView.Fixed)
+        header.setSectionResizeMode(3, QHeaderView.Fixed)
+        header.resizeSection(0, 52)
+        header.resizeSection(3, 96)  # room for Glicko's "1234 ± 56"
         tbl.verticalHeader().setVisible(False)
+        tbl.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         tbl.setEditTriggers(QAbstractItemView.NoEditTriggers)
         tbl.setSelectionMode(QAbstractItemView.NoSelection)
         tbl.setFocusPolicy(Qt.NoFocus)
         vbox.addWidget(tbl)
 
-        # Store container separately from the table widget
+        # Store container separately from the table view
         setattr(self, f"_container_{heading.lower()}", container)
         return tbl
 
+    @staticmethod
+    def _show_status(status: QLabel, busy: bool):
+        status.setText("Loading…")
+        status.setVisible(busy)
+
     # ── Data ──────────────────────────────────────────────────────────────────
 
     def refresh(self):
+        """Restart only the rankings whose data or filter changed since last shown."""
         g = self._gender_filter
-        self._populate(self._tbl_husband, self._get_top(1, g), COLORS["blue"])
-        self._populate(self._tbl_wife, self._get_top(2, g), COLORS["pink"])
-        self._populate(self._tbl_combined, self._get_combined(g), COLORS["laven"])
-
-    def _eligible_gender_values(self, mode: str | None):
-        """Return Gender enum values eligible for a mode filter."""
-        if mode == "M":
-            return [Gender.M, Gender.N]
-        elif mode == "F":
-            return [Gender.F, Gender.N]
-        return None  # no filter
-
-    def _get_top(
-        self, profile_id: int, mode: str | None
-    ) -> list[tuple[str, str, float]]:
-        eligible = self._eligible_gender_values(mode)
-        with get_session() as s:
-            Name.__table__.alias("first_name")
-            Name.__table__.alias("middle_name")
-
-            q = s.query(
-                NameCombo.first_id,
-                NameCombo.middle_id,
-                NameCombo.elo_score,
-            ).filter(NameCombo.profile_id == profile_id)
-
-            if eligible:
-                first_ids = {
-                    n.id for n in s.query(Name).filter(Name.gender.in_(eligible)).all()
-                }
-                q = q.filter(
-                    NameCombo.first_id.in_(first_ids),
-                    NameCombo.middle_id.in_(first_ids),
-                )
-
-            rows = q.order_by(NameCombo.elo_score.desc()).limit(TOP_N).all()
-
-            result = []
-            for first_id, middle_id, elo in rows:
-                fn = s.get(Name, first_id)
-                mn = s.get(Name, middle_id)
-                result.append((fn.text, mn.text, elo))
-        return result
-
-    def _get_combined(self, mode: str | None) -> list[tuple[str, str, float]]:
-        """Average Elo across both profiles."""
-        eligible = self._eligible_gender_values(mode)
-        with get_session() as s:
-            q = s.query(
-                NameCombo.first_id,
-                NameCombo.middle_id,
-                func.avg(NameCombo.elo_score).label("avg_elo"),
-            ).filter(NameCombo.profile_id.in_([1, 2]))
-
-            if eligible:
-                eligible_ids = {
-                    n.id for n in s.query(Name).filter(Name.gender.in_(eligible)).all()
-                }
-                q = q.filter(
-                    NameCombo.first_id.in_(eligible_ids),
-                    NameCombo.middle_id.in_(eligible_ids),
-                )
-
-            rows = (
-                q.group_by(NameCombo.first_id, NameCombo.middle_id)
-                .order_by(func.avg(NameCombo.elo_score).desc())
-                .limit(TOP_N)
-                .all()
-            )
-
-            result = []
-            for first_id, middle_id, avg_elo in rows:
-                fn = s.get(Name, first_id)
-                mn = s.get(Name, middle_id)
-                result.append((fn.text, mn.text, avg_elo))
-        return result
-
-    def _populate(
-        self, tbl: QTableWidget, rows: list[tuple[str, str, float]], color: str
-    ):
-        tbl.setRowCount(0)
-        get_setting("surname") or "Smith"
-        for rank, (first, middle, elo) in enumerate(rows, 1):
-            tbl.insertRow(rank - 1)
-            rank_item = QTableWidgetItem(str(rank))
-            rank_item.setTextAlignment(Qt.AlignCenter)
-            first_item = QTableWidgetItem(first)
-            middle_item = QTableWidgetItem(middle)
-            elo_item = QTableWidgetItem(f"{elo:.0f}")
-            elo_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-            if rank == 1:
-                for item in (rank_item, first_item, middle_item, elo_item):
-                    item.setForeground(QColor(color))
-
-            tbl.setItem(rank - 1, 0, rank_item)
-            tbl.setItem(rank - 1, 1, first_item)
-            tbl.setItem(rank - 1, 2, middle_item)
-            tbl.setItem(rank - 1, 3, elo_item)
+        tables = [
+            (self._tbl_husband, [1]),
+            (self._tbl_wife, [2]),
+            # Across both profiles (unplayed in a profile = default Elo)
+            (self._tbl_combined, [1, 2]),
+        ]
+        cfg = settings()
+        for tbl, profile_ids in tables:
+            scopes = [epoch.NAMES, epoch.SETTINGS]
+            scopes += [epoch.profile_scope(p) for p in profile_ids]
+            stamp = (epoch.epoch(*scopes), g)
+            if self._rendered.get(tbl) == stamp:
+                continue
+            # Pages load off the GUI thread; a newer query supersedes this one
+            tbl.model().set_query(profile_ids, g, cfg.combined_score, cfg.score_source)
+            tbl.scrollToTop()
+            self._rendered[tbl] = stamp
 
     # ── Filters ───────────────────────────────────────────────────────────────
 
@@ -0,0 +1,86 @@
+"""
+Background data loading for screens.
+
+A DataLoader runs a query function on Qt's global thread pool and hands
+the result back on the GUI thread through its `loaded` signal (emitted
+from the worker, delivered queued). Each loader serves one consumer and
+only ever delivers its newest request: starting a new request (or
+calling cancel) skips a still-queued job and discards the result of one
+already running, so a quick filter change never paints stale rows.
+"""
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class _Signals(QObject):
+    done = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _Job(QRunnable):
+    def __init__(self, loader: "DataLoader", ticket: int, fn, args):
+        super().__init__()
+        self._loader = loader
+        self._ticket = ticket
+        self._fn = fn
+        self._args = args
+
+    def run(self):
+        signals = self._loader._signals
+        if self._loader._ticket != self._ticket:
+            return  # superseded while queued
+        try:
+            result = self._fn(*self._args)
+        except Exception as exc:  # surfaced to the GUI thread, not swallowed
+            signals.failed.emit(self._ticket, f"{type(exc).__name__}: {exc}")
+            return
+        signals.done.emit(self._ticket, result)
+
+
+class DataLoader(QObject):
+    loaded = Signal(object)
+    failed = Signal(str)
+    busy_changed = Signal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ticket = 0
+        self._busy = False
+        # Created on the GUI thread, so worker emits arrive here queued
+        self._signals = _Signals(self)
+        self._signals.done.connect(self._on_done)
+        self._signals.failed.connect(self._on_failed)
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    def request(self, fn, *args):
+        """Run fn(*args) in the background, superseding any earlier request."""
+        self._ticket += 1
+        QThreadPool.globalInstance().start(_Job(self, self._ticket, fn, args))
+        self._set_busy(True)
+
+    def cancel(self):
+        """Forget the current request; its result will never be delivered."""
+        self._ticket += 1
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool):
+        if busy != self._busy:
+            self._busy = busy
+            self.busy_changed.emit(busy)
+
+    def _finish(self, ticket: int) -> bool:
+        if ticket != self._ticket:
+            return False  # superseded or cancelled
+        self._set_busy(False)
+        return True
+
+    def _on_done(self, ticket: int, result):
+        if self._finish(ticket):
+            self.loaded.emit(result)
+
+    def _on_failed(self, ticket: int, message: str):
+        if self._finish(ticket):
+            self.failed.emit(message)
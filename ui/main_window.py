@@ -1,14 +1,20 @@
 """Main window — tab-based shell."""
 
+from PySide6.QtCore import QTimer, Signal
 from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
+from logic.elo import flush_votes, on_flush_status, request_flush
 from ui.match_screen import MatchScreen
 from ui.leaderboard_screen import LeaderboardScreen
 from ui.combo_screen import ComboScreen
 from ui.add_names_screen import AddNamesScreen
 from ui.settings_screen import SettingsScreen
 
+FLUSH_INTERVAL_MS = 2000
+
 
 class MainWindow(QMainWindow):
+    _flush_status = Signal(object)  # crosses from the vote-flush worker
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Nominis")
@@ -39,7 +45,24 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.tabs)
         self.setCentralWidget(container)
 
+        # Write-behind votes reach the database at least this often, written
+        # on the vote-flush worker so the timer never stalls a click
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(request_flush)
+        self._flush_timer.start(FLUSH_INTERVAL_MS)
+        self._flush_status.connect(self._show_flush_status)
+        on_flush_status(self._flush_status.emit)
+
+    def _show_flush_status(self, error: str | None):
+        if error:
+            self.statusBar().showMessage(
+                f"Saving votes failed — {error}. They are kept and retried."
+            )
+        else:
+            self.statusBar().showMessage("Pending votes saved", 4000)
+
     def _on_tab_changed(self, idx: int):
+        flush_votes()  # other screens read ratings straight from the database
         widget = self.tabs.widget(idx)
         if hasattr(widget, "refresh"):
             widget.refresh()
@@ -1,4 +1,9 @@
-"""Match (this-or-that) screen — votes on (first, middle, surname) combos."""
+"""
+Match (this-or-that) screen — votes on (first, middle, surname) combos.
+
+With Settings.round_size above 2 it shows a round of that many combos
+instead, and the one picked wins over all the others.
+"""
 
 from PySide6.QtWidgets import (
     QWidget,
@@ -9,24 +14,34 @@ from PySide6.QtWidgets import (
     QButtonGroup,
     QRadioButton,
     QSizePolicy,
+    QStackedWidget,
 )
-from PySide6.QtCore import Qt, QTimer
-from database.db import get_session, get_setting
-from database.models import NameCombo, Name
-from logic.matchmaker import pick_combo_pair
-from logic.elo import update_elo, record_skip
+from PySide6.QtCore import Qt, Signal
+from database import epoch
+from database.db import on_settings_changed, settings
+from logic.elo import update_elo, update_round, record_skip
+from logic.matchmaker import MAX_ROUND, mark_shown
+from logic.prefetch import PairPrefetcher, PreparedPair, PreparedRound
 from styles.theme import COLORS
 
 
 class MatchScreen(QWidget):
+    # Emitted from the prefetch worker; delivered queued on the GUI thread
+    _pair_ready = Signal(object)  # failure message, or None
+
     def __init__(self):
         super().__init__()
         self._profile_id = 1  # 1 = Husband, 2 = Wife
         self._gender_mode = "M"  # "M" or "F"
-        self._combo_a: NameCombo | None = None
-        self._combo_b: NameCombo | None = None
+        self._pair: PreparedPair | PreparedRound | None = None
+        self._round_size = 2  # round size the prefetcher was configured with
+        self._prefetch = PairPrefetcher()
+        self._pair_ready.connect(self._on_pair_ready)
+        self._prefetch.on_ready(self._pair_ready.emit)
         self._session_total = 0
+        self._names_epoch = -1  # names epoch the prefetch queue was built at
         self._build_ui()
+        on_settings_changed(self._on_settings_changed)
         self.refresh()
 
     # ── UI construction ───────────────────────────────────────────────────────
@@ -92,7 +107,10 @@ class MatchScreen(QWidget):
         root.addWidget(self._stats_label)
 
         # ── Battle area ───────────────────────────────────────────────────────
-        battle = QHBoxLayout()
+        self._battle = QStackedWidget()
+        pair_area = QWidget()
+        battle = QHBoxLayout(pair_area)
+        battle.setContentsMargins(0, 0, 0, 0)
         battle.setSpacing(24)
 
         self._btn_a = QPushButton("")
@@ -115,7 +133,23 @@ class MatchScreen(QWidget):
         battle.addWidget(self._btn_a)
         battle.addWidget(vs)
         battle.addWidget(self._btn_b)
-        root.addLayout(battle, stretch=1)
+        self._battle.addWidget(pair_area)
+
+        # Round of N — one card per combo, the best one is clicked
+        round_area = QWidget()
+        row = QHBoxLayout(round_area)
+        row.setContentsMargins(0, 0, 0, 0)
+        row.setSpacing(16)
+        self._round_btns: list[QPushButton] = []
+        for i in range(MAX_ROUND):
+            btn = QPushButton("")
+            btn.setObjectName("name_card_round")
+            btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            btn.clicked.connect(lambda _checked=False, i=i: self._choose_round(i))
+            row.addWidget(btn)
+            self._round_btns.append(btn)
+        self._battle.addWidget(round_area)
+        root.addWidget(self._battle, stretch=1)
 
         # ── Controls ──────────────────────────────────────────────────────────
         ctrl = QHBoxLayout()
@@ -124,15 +158,20 @@ class MatchScreen(QWidget):
         self._skip_btn.setObjectName("skip_btn")
         self._skip_btn.clicked.connect(self._skip)
         ctrl.addWidget(self._skip_btn)
+        self._retry_btn = QPushButton("Retry")
+        self._retry_btn.setObjectName("skip_btn")
+        self._retry_btn.clicked.connect(self._retry)
+        self._retry_btn.setVisible(False)
+        ctrl.addWidget(self._retry_btn)
         ctrl.addStretch()
         root.addLayout(ctrl)
 
-        hint = QLabel(
+        self._hint = QLabel(
             "← Left arrow  /  Right arrow →  to choose  ·  ↑ Up arrow to skip"
         )
-        hint.setObjectName("muted")
-        hint.setAlignment(Qt.AlignCenter)
-        root.addWidget(hint)
+        self._hint.setObjectName("muted")
+        self._hint.setAlignment(Qt.AlignCenter)
+        root.addWidget(self._hint)
 
         self._feedback = QLabel("")
         self._feedback.setAlignment(Qt.AlignCenter)
@@ -151,6 +190,8 @@ class MatchScreen(QWidget):
             self._choose("b")
         elif key == Qt.Key_Up:
             self._skip()
+        elif Qt.Key_1 <= key < Qt.Key_1 + MAX_ROUND:
+            self._choose_round(key - Qt.Key_1)
         else:
             super().keyPressEvent(event)
 
@@ -166,74 +207,143 @@ class MatchScreen(QWidget):
         self._load_next_pair()
 
     def refresh(self):
+        # Names may have been added elsewhere — don't serve stale pairs
+        names_epoch = epoch.epoch(epoch.NAMES)
+        if self._pair and names_epoch == self._names_epoch:
+            return
+        self._names_epoch = names_epoch
+        self._prefetch.clear()
         self._load_next_pair()
 
     # ── Combo loading ─────────────────────────────────────────────────────────
 
-    def _combo_label(self, combo: NameCombo) -> str:
-        surname = get_setting("surname") or "Smith"
-        return f"{combo.first.text}\n{combo.middle.text}\n{surname}"
-
-    def _load_next_pair(self):
-        pair = pick_combo_pair(self._profile_id, self._gender_mode)
+    def _load_next_pair(self, clear_feedback: bool = True):
+        self._round_size = settings().round_size
+        self._prefetch.configure(self._profile_id, self._gender_mode, self._round_size)
+        pair = self._prefetch.take_nowait()
+        self._pair = pair
+        error = None if pair else self._prefetch.error
+        recovered = not self._retry_btn.isHidden() and error is None
+        self._retry_btn.setVisible(error is not None)
 
         if not pair:
-            self._btn_a.setText("Add more names\nto play!")
+            # Still being picked (e.g. the pool is loading), failed, or none
+            # possible
+            if error is not None:
+                text = "Couldn't load\na match"
+                self._flash_feedback(f"Loading failed — {error}", COLORS["pink"])
+            elif self._prefetch.exhausted:
+                text = "Add more names\nto play!"
+            else:
+                text = "Loading…"
+            self._battle.setCurrentIndex(0)
+            self._btn_a.setText(text)
+            self._btn_a.setEnabled(False)
             self._btn_b.setText("")
             self._btn_b.setEnabled(False)
             self._skip_btn.setEnabled(False)
             self._update_stats()
             return
 
+        self._btn_a.setEnabled(True)
         self._btn_b.setEnabled(True)
         self._skip_btn.setEnabled(True)
 
-        id_a, id_b = pair
-        with get_session() as s:
-            combo_a = s.get(NameCombo, id_a)
-            combo_b = s.get(NameCombo, id_b)
-            # Eagerly load relationships before session closes
-            self._combo_a_id = combo_a.id
-            self._combo_b_id = combo_b.id
-            first_a = s.get(Name, combo_a.first_id).text
-            mid_a = s.get(Name, combo_a.middle_id).text
-            first_b = s.get(Name, combo_b.first_id).text
-            mid_b = s.get(Name, combo_b.middle_id).text
-
-        surname = get_setting("surname") or "Smith"
-        self._btn_a.setText(f"{first_a}\n{mid_a}\n{surname}")
-        self._btn_b.setText(f"{first_b}\n{mid_b}\n{surname}")
-        self._feedback.setText("")
+        self._show_pair(pair)
+        mark_shown(self._profile_id, pair.combos)  # cooldowns start on screen
+        if clear_feedback or recovered:
+            self._feedback.setText("")
         self._update_stats()
         self.setFocus()
 
+    def _show_pair(self, pair: PreparedPair | PreparedRound):
+        surname = settings().surname
+        if isinstance(pair, PreparedRound):
+            self._battle.setCurrentIndex(1)
+            for i, btn in enumerate(self._round_btns):
+                btn.setVisible(i < len(pair.texts))
+                if i < len(pair.texts):
+                    first, middle = pair.texts[i]
+                    btn.setText(f"{first}\n{middle}\n{surname}")
+            self._hint.setText(
+                f"1 – {len(pair.texts)}  to pick the best  ·  ↑ Up arrow to skip"
+            )
+            return
+        self._battle.setCurrentIndex(0)
+        self._btn_a.setText(f"{pair.first_a}\n{pair.middle_a}\n{surname}")
+        self._btn_b.setText(f"{pair.first_b}\n{pair.middle_b}\n{surname}")
+        self._hint.setText(
+            "← Left arrow  /  Right arrow →  to choose  ·  ↑ Up arrow to skip"
+        )
+
+    def _on_pair_ready(self, _error: str | None):
+        if self._pair is None:
+            self._load_next_pair(clear_feedback=False)
+
+    def _retry(self):
+        self._prefetch.retry()
+        self._load_next_pair()
+
+    def _on_settings_changed(self, cfg):
+        if cfg.round_size != self._round_size:
+            self._load_next_pair()  # the match on screen has the old size
+        elif self._pair:
+            # Surname may have changed — relabel the pair on screen
+            self._show_pair(self._pair)
+
     # ── Vote / skip ───────────────────────────────────────────────────────────
 
     def _choose(self, side: str):
-        if not hasattr(self, "_combo_a_id") or not hasattr(self, "_combo_b_id"):
+        pair = self._pair
+        if not isinstance(pair, PreparedPair):
             return
-        winner_id = self._combo_a_id if side == "a" else self._combo_b_id
-        loser_id = self._combo_b_id if side == "a" else self._combo_a_id
-
-        # Get winner name for feedback
-        with get_session() as s:
-            w = s.get(NameCombo, winner_id)
-            first_text = s.get(Name, w.first_id).text
-            mid_text = s.get(Name, w.middle_id).text
+        if side == "a":
+            winner_key, loser_key = pair.combo_a, pair.combo_b
+            first_text, mid_text = pair.first_a, pair.middle_a
+        else:
+            winner_key, loser_key = pair.combo_b, pair.combo_a
+            first_text, mid_text = pair.first_b, pair.middle_b
 
-        update_elo(self._profile_id, winner_id, loser_id)
+        update_elo(self._profile_id, winner_key, loser_key)
+        self._prefetch.invalidate((winner_key, loser_key))
         self._session_total += 1
         color = COLORS["blue"] if side == "a" else COLORS["pink"]
         self._flash_feedback(f"✓  {first_text} {mid_text} wins this round", color)
-        QTimer.singleShot(350, self._load_next_pair)
+        self._load_next_pair(clear_feedback=False)
 
-    def _skip(self):
-        if not hasattr(self, "_combo_a_id") or not hasattr(self, "_combo_b_id"):
+    def _choose_round(self, index: int):
+        rnd = self._pair
+        if not isinstance(rnd, PreparedRound) or index >= len(rnd.combos):
             return
-        record_skip(self._profile_id, self._combo_a_id, self._combo_b_id)
+        winner_key = rnd.combos[index]
+        keys = [winner_key, *(k for k in rnd.combos if k != winner_key)]
+
+        update_round(self._profile_id, keys)
+        self._prefetch.invalidate(rnd.combos)
         self._session_total += 1
-        self._flash_feedback("Skipped — both combos re-queued", COLORS["muted"])
-        QTimer.singleShot(350, self._load_next_pair)
+        first_text, mid_text = rnd.texts[index]
+        self._flash_feedback(
+            f"✓  {first_text} {mid_text} wins this round of {len(keys)}",
+            COLORS["laven"],
+        )
+        self._load_next_pair(clear_feedback=False)
+
+    def _skip(self):
+        pair = self._pair
+        if pair is None:
+            return
+        if isinstance(pair, PreparedRound):
+            # A skip cools one pair; a round has no pair to cool, so the
+            # round is simply replaced. Nothing is recorded, so it isn't
+            # counted as a match either
+            msg = "Skipped — a new round is up"
+        else:
+            record_skip(self._profile_id, pair.combo_a, pair.combo_b)
+            self._prefetch.invalidate((pair.combo_a, pair.combo_b))
+            self._session_total += 1
+            msg = "Skipped — both combos re-queued"
+        self._flash_feedback(msg, COLORS["muted"])
+        self._load_next_pair(clear_feedback=False)
 
     def _flash_feedback(self, msg: str, color: str):
         self._feedback.setText(msg)
@@ -0,0 +1,130 @@
+"""Lazily paged table model over a logic/leaderboard ranking."""
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+from PySide6.QtGui import QColor
+
+from logic.leaderboard import top_combos
+from ui.loader import DataLoader
+
+PAGE_SIZE = 100
+
+# data() runs for every visible cell on every paint — keep it to lookups
+_DISPLAY = Qt.DisplayRole
+_ALIGN_ROLE = Qt.TextAlignmentRole
+_FOREGROUND = Qt.ForegroundRole
+_ALIGNMENT = (Qt.AlignCenter, None, None, Qt.AlignRight | Qt.AlignVCenter)
+
+# models.SCORE_SOURCES → score column header
+SCORE_HEADERS = {"elo": "Elo", "bt": "BT", "glicko": "Glicko"}
+
+
+def format_score(score: float, margin: float | None) -> str:
+    """ "1234", or "1234 ± 56" when the score has a confidence interval."""
+    return f"{score:.0f}" if margin is None else f"{score:.0f} ± {margin:.0f}"
+
+
+class RankingModel(QAbstractTableModel):
+    """
+    # · First · Middle · score for one ranking (a profile, or Combined),
+    the score column headed by its source (see SCORE_HEADERS).
+    Rows are fetched PAGE_SIZE at a time as the view scrolls, so the full
+    ranking can be browsed without loading or building it all up front.
+    Pages load on a background thread; `loading` reports when one is in
+    flight so the view can show a placeholder, and `failed` carries a
+    message when one could not be loaded.
+    """
+
+    HEADERS = ["#", "First", "Middle", "Elo"]
+    loading = Signal(bool)
+    failed = Signal(str)
+
+    def __init__(self, color: str, parent=None):
+        super().__init__(parent)
+        self._color = QColor(color)
+        self._rows: list[tuple[str, str, str, str]] = []  # display text per cell
+        # (profile_ids, gender_mode, aggregate, source)
+        self._query: tuple | None = None
+        self._headers = self.HEADERS
+        self._last: tuple | None = None  # last raw row loaded; the next page's key
+        self._exhausted = True
+        self._loader = DataLoader(self)
+        self._loader.loaded.connect(self._append_page)
+        self._loader.failed.connect(self._on_failed)
+        self._loader.busy_changed.connect(self.loading)
+
+    def set_query(
+        self,
+        profile_ids: list[int],
+        gender_mode: str | None,
+        aggregate: str,
+        source: str = "elo",
+    ):
+        """Restart the ranking from the top; any page still loading is dropped."""
+        self._loader.cancel()
+        self.beginResetModel()
+        self._query = (profile_ids, gender_mode, aggregate, source)
+        self._headers = [*self.HEADERS[:3], SCORE_HEADERS[source]]
+        self._rows = []
+        self._last = None
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    # ── Paging ────────────────────────────────────────────────────────────────
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loader.busy
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        profile_ids, gender_mode, aggregate, source = self._query
+        self._loader.request(
+            top_combos,
+            profile_ids,
+            gender_mode,
+            PAGE_SIZE,
+            aggregate,
+            self._last,
+            source,
+        )
+
+    def _append_page(self, page: list[tuple]):
+        self._exhausted = len(page) < PAGE_SIZE
+        if not page:
+            return
+        self._last = page[-1]
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(
+            (str(rank), first, middle, format_score(elo, margin))
+            for rank, (first, middle, elo, margin, *_) in enumerate(page, start + 1)
+        )
+        self.endInsertRows()
+
+    def _on_failed(self, message: str):
+        # Stop paging until set_query, rather than retrying on every scroll
+        self._exhausted = True
+        self.failed.emit(f"Load failed — {message}")
+
+    # ── Model interface ───────────────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def data(self, index, role=_DISPLAY):
+        if role == _DISPLAY:
+            return self._rows[index.row()][index.column()]
+        if role == _ALIGN_ROLE:
+            return _ALIGNMENT[index.column()]
+        if role == _FOREGROUND and index.row() == 0:
+            return self._color
+        return None
@@ -1,6 +1,7 @@
 """Settings screen."""
 
 from PySide6.QtWidgets import (
+    QComboBox,
     QFormLayout,
     QFrame,
     QHBoxLayout,
@@ -13,12 +14,44 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from database.db import get_setting, set_setting
+from database.db import session_scope, settings, update_settings
+from logic.bradley_terry import fit_bradley_terry
+from logic.combined import rebuild_combined
+from logic.matchmaker import MAX_ROUND
+from logic.replay import ratings_changed, replay_ratings
+from ui.loader import DataLoader
+
+# models.COMBINED_AGGREGATES → label
+COMBINED_LABELS = {
+    "mean": "Average",
+    "min": "Lowest of the two",
+    "geo": "Geometric mean",
+    "weighted": "Weighted by matches",
+}
+
+# models.SCORE_SOURCES → label
+SCORE_LABELS = {
+    "elo": "Online Elo",
+    "bt": "Bradley–Terry fit",
+    "glicko": "Glicko-2 (with confidence)",
+}
+
+# matchmaker.STRATEGIES → label
+STRATEGY_LABELS = {
+    "classic": "Reputation & streaks",
+    "active": "Active learning (top K)",
+}
 
 
 class SettingsScreen(QWidget):
     def __init__(self):
         super().__init__()
+        self._fit_loader = DataLoader(self)
+        self._fit_loader.loaded.connect(self._on_fit_done)
+        self._fit_loader.failed.connect(self._on_fit_failed)
+        self._replay_loader = DataLoader(self)
+        self._replay_loader.loaded.connect(self._on_replay_done)
+        self._replay_loader.failed.connect(self._on_replay_failed)
         self._build_ui()
 
     def _build_ui(self):
@@ -39,6 +72,37 @@ class SettingsScreen(QWidget):
         self._surname_input.setMaximumWidth(200)
         gen_form.addRow("Family surname:", self._surname_input)
 
+        self._combined_score = QComboBox()
+        for agg, label in COMBINED_LABELS.items():
+            self._combined_score.addItem(label, agg)
+        self._combined_score.setMaximumWidth(200)
+        self._combined_score.setToolTip(
+            "How the Combined ranking merges both profiles' Elo. Default: Average"
+        )
+        gen_form.addRow("Combined ranking:", self._combined_score)
+
+        self._score_source = QComboBox()
+        for source, label in SCORE_LABELS.items():
+            self._score_source.addItem(label, source)
+        self._score_source.setMaximumWidth(200)
+        self._score_source.setToolTip(
+            "Score the leaderboards and combo generator rank by. Elo updates on "
+            "every vote; the Bradley–Terry fit uses the whole history at once; "
+            "Glicko-2 also shows a 95% confidence margin. Default: Online Elo"
+        )
+        gen_form.addRow("Ranking score:", self._score_source)
+
+        fit_row = QHBoxLayout()
+        self._fit_btn = QPushButton("Refit now")
+        self._fit_btn.setFixedWidth(100)
+        self._fit_btn.clicked.connect(self._start_fit)
+        fit_row.addWidget(self._fit_btn)
+        self._fit_status = QLabel("")
+        self._fit_status.setObjectName("muted")
+        fit_row.addWidget(self._fit_status)
+        fit_row.addStretch()
+        gen_form.addRow("Bradley–Terry fit:", fit_row)
+
         gen_card.layout().addLayout(gen_form)
         root.addWidget(gen_card)
 
@@ -47,6 +111,24 @@ class SettingsScreen(QWidget):
         mm_form = QFormLayout()
         mm_form.setSpacing(12)
 
+        self._strategy = QComboBox()
+        for strategy, label in STRATEGY_LABELS.items():
+            self._strategy.addItem(label, strategy)
+        self._strategy.setMaximumWidth(200)
+        self._strategy.setToolTip(
+            "How match pairs are chosen. Active learning spends votes where "
+            "they are most likely to change the top K, using each combo's "
+            "Glicko confidence, and ignores Random match %. "
+            "Default: Reputation & streaks"
+        )
+        mm_form.addRow("Strategy:", self._strategy)
+
+        self._top_k = QSpinBox()
+        self._top_k.setRange(1, 100)
+        self._top_k.setMaximumWidth(100)
+        self._top_k.setToolTip("How many top combos active learning sorts out.")
+        mm_form.addRow("Top K:", self._top_k)
+
         self._rand_pct = QSpinBox()
         self._rand_pct.setRange(0, 100)
         self._rand_pct.setSuffix(" %")
@@ -64,6 +146,63 @@ class SettingsScreen(QWidget):
         )
         mm_form.addRow("Spread threshold:", self._spread_thresh)
 
+        self._recent_pairs = QSpinBox()
+        self._recent_pairs.setRange(0, 1000)
+        self._recent_pairs.setMaximumWidth(100)
+        self._recent_pairs.setToolTip(
+            "How many recent matchups are not served again. 0 turns it off. Default: 50"
+        )
+        mm_form.addRow("Pair cooldown:", self._recent_pairs)
+
+        self._recent_names = QSpinBox()
+        self._recent_names.setRange(0, 20)
+        self._recent_names.setSuffix(" rounds")
+        self._recent_names.setMaximumWidth(100)
+        self._recent_names.setToolTip(
+            "Rounds a name sits out after appearing, where the pool allows. Default: 1"
+        )
+        mm_form.addRow("Name cooldown:", self._recent_names)
+
+        self._pair_history = QSpinBox()
+        self._pair_history.setRange(0, 1_000_000)
+        self._pair_history.setSingleStep(1000)
+        self._pair_history.setMaximumWidth(100)
+        self._pair_history.setToolTip(
+            "Also avoid any of this many past matchups, remembered "
+            "approximately (about 1% false hits). 0 turns it off. Default: 0"
+        )
+        mm_form.addRow("Long pair history:", self._pair_history)
+
+        self._implied_depth = QSpinBox()
+        self._implied_depth.setRange(0, 6)
+        self._implied_depth.setMaximumWidth(100)
+        self._implied_depth.setToolTip(
+            "Skip matchups whose result already follows from this many earlier "
+            "wins in a row (A beat B, B beat C ⇒ A over C is 2). 0 turns it off. "
+            "Default: 2"
+        )
+        mm_form.addRow("Implied result depth:", self._implied_depth)
+
+        self._cycle_pct = QSpinBox()
+        self._cycle_pct.setRange(0, 100)
+        self._cycle_pct.setSuffix(" %")
+        self._cycle_pct.setMaximumWidth(100)
+        self._cycle_pct.setToolTip(
+            "Share of matches spent on combos whose results contradict each "
+            "other (A beat B, B beat C, C beat A). Default: 10%"
+        )
+        mm_form.addRow("Cycle match %:", self._cycle_pct)
+
+        self._round_size = QSpinBox()
+        self._round_size.setRange(2, MAX_ROUND)
+        self._round_size.setSuffix(" combos")
+        self._round_size.setMaximumWidth(100)
+        self._round_size.setToolTip(
+            "Combos shown per match. 2 is this-or-that; more shows a round "
+            "where the best one wins over all the others. Default: 2"
+        )
+        mm_form.addRow("Round size:", self._round_size)
+
         mm_card.layout().addLayout(mm_form)
         root.addWidget(mm_card)
 
@@ -100,11 +239,14 @@ class SettingsScreen(QWidget):
         # Save button
         btn_row = QHBoxLayout()
         btn_row.addStretch()
-        save_btn = QPushButton("Save Settings")
-        save_btn.setObjectName("primary")
-        save_btn.setFixedWidth(140)
-        save_btn.clicked.connect(self._save)
-        btn_row.addWidget(save_btn)
+        self._save_status = QLabel("")
+        self._save_status.setObjectName("muted")
+        btn_row.addWidget(self._save_status)
+        self._save_btn = QPushButton("Save Settings")
+        self._save_btn.setObjectName("primary")
+        self._save_btn.setFixedWidth(140)
+        self._save_btn.clicked.connect(self._save)
+        btn_row.addWidget(self._save_btn)
         root.addLayout(btn_row)
 
         root.addStretch()
@@ -122,23 +264,96 @@ class SettingsScreen(QWidget):
         return card
 
     def refresh(self):
-        self._surname_input.setText(get_setting("surname") or "Smith")
-        self._rand_pct.setValue(int(get_setting("match_random_pct") or 30))
-        self._spread_thresh.setValue(int(get_setting("elo_spread_thresh") or 50))
-        self._k_default.setValue(int(get_setting("k_factor_default") or 32))
-        self._k_stable.setValue(int(get_setting("k_factor_stable") or 16))
-        self._k_threshold.setValue(int(get_setting("k_stable_threshold") or 20))
+        cfg = settings()
+        self._surname_input.setText(cfg.surname)
+        idx = self._strategy.findData(cfg.match_strategy)
+        self._strategy.setCurrentIndex(max(0, idx))
+        self._top_k.setValue(cfg.active_top_k)
+        self._rand_pct.setValue(cfg.match_random_pct)
+        self._spread_thresh.setValue(cfg.elo_spread_thresh)
+        self._recent_pairs.setValue(cfg.recent_pairs)
+        self._recent_names.setValue(cfg.recent_names)
+        self._pair_history.setValue(cfg.pair_history)
+        self._implied_depth.setValue(cfg.implied_depth)
+        self._cycle_pct.setValue(cfg.cycle_match_pct)
+        self._round_size.setValue(cfg.round_size)
+        self._k_default.setValue(cfg.k_factor_default)
+        self._k_stable.setValue(cfg.k_factor_stable)
+        self._k_threshold.setValue(cfg.k_stable_threshold)
+        idx = self._combined_score.findData(cfg.combined_score)
+        self._combined_score.setCurrentIndex(max(0, idx))
+        idx = self._score_source.findData(cfg.score_source)
+        self._score_source.setCurrentIndex(max(0, idx))
 
     def _save(self):
-        set_setting("surname", self._surname_input.text().strip() or "Smith")
-        set_setting("match_random_pct", str(self._rand_pct.value()))
-        set_setting("elo_spread_thresh", str(self._spread_thresh.value()))
-        set_setting("k_factor_default", str(self._k_default.value()))
-        set_setting("k_factor_stable", str(self._k_stable.value()))
-        set_setting("k_stable_threshold", str(self._k_threshold.value()))
+        old = settings()
+        update_settings(
+            surname=self._surname_input.text().strip() or "Smith",
+            match_strategy=self._strategy.currentData(),
+            active_top_k=self._top_k.value(),
+            match_random_pct=self._rand_pct.value(),
+            elo_spread_thresh=self._spread_thresh.value(),
+            recent_pairs=self._recent_pairs.value(),
+            recent_names=self._recent_names.value(),
+            pair_history=self._pair_history.value(),
+            implied_depth=self._implied_depth.value(),
+            cycle_match_pct=self._cycle_pct.value(),
+            round_size=self._round_size.value(),
+            k_factor_default=self._k_default.value(),
+            k_factor_stable=self._k_stable.value(),
+            k_stable_threshold=self._k_threshold.value(),
+            combined_score=self._combined_score.currentData(),
+            score_source=self._score_source.currentData(),
+        )
+        new = settings()
+
+        replay = ratings_changed(old, new)
+        if replay:
+            # New K-factors: recompute every rating from the match log, in
+            # the background; the dialog waits for the result
+            self._save_btn.setEnabled(False)
+            self._save_status.setText("Recomputing ratings…")
+            self._replay_loader.request(replay_ratings)
+        elif new.score_source != old.score_source:
+            # The Combined table is materialized from the active source
+            with session_scope() as s:
+                rebuild_combined(s)
+        if new.score_source == "bt" and old.score_source != "bt":
+            self._start_fit()  # bring the fit up to date in the background
 
+        if not replay:
+            self._show_saved("Settings saved successfully.")
+
+    def _on_replay_done(self, replayed: int):
+        self._save_btn.setEnabled(True)
+        self._save_status.setText("")
+        self._show_saved(
+            "Settings saved successfully.\n\n"
+            f"Ratings were recomputed from {replayed} matches."
+        )
+
+    def _on_replay_failed(self, message: str):
+        self._save_btn.setEnabled(True)
+        self._save_status.setText(f"Recompute failed — {message}")
+
+    def _show_saved(self, message: str):
         dlg = QMessageBox(self)
         dlg.setWindowTitle("Saved")
-        dlg.setText("Settings saved successfully.")
+        dlg.setText(message)
         dlg.setIcon(QMessageBox.Information)
         dlg.exec()
+
+    # ── Bradley–Terry fit ─────────────────────────────────────────────────────
+
+    def _start_fit(self):
+        self._fit_btn.setEnabled(False)
+        self._fit_status.setText("Fitting…")
+        self._fit_loader.request(fit_bradley_terry)
+
+    def _on_fit_done(self, votes: int):
+        self._fit_btn.setEnabled(True)
+        self._fit_status.setText(f"Fitted to {votes} votes.")
+
+    def _on_fit_failed(self, message: str):
+        self._fit_btn.setEnabled(True)
+        self._fit_status.setText(f"Fit failed — {message}")